@@ -89,6 +89,14 @@ Item {
                             }
                         }
 
+                        Connections {
+                            target: users
+                            // Avatars of users on other pages are loaded on demand
+                            function onAvatarsChanged() {
+                                userImage.source = Qt.binding(userImage.getCurrentUserImage)
+                            }
+                        }
+
                         Image {
                             id: userMask
                             source: "qrc:/qt/qml/ColorPalette/icons/userMask.svg"
@@ -15,7 +15,7 @@ class AbstractResource(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.m_manager = None  # QRestAccessManager
+        self.m_manager = None  # RequestScheduler
         self.m_api = None  # QNetworkRequestFactory
 
     def setAccessManager(self, manager):
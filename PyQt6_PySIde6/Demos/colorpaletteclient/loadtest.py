@@ -0,0 +1,228 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Load test of the color palette resources against the mock server.
+
+The mock server is started in a separate process. Page flips of the users
+and colors and changes of colors are issued at a fixed rate, without a
+user interface, while a timer on the GUI thread records how late it fires,
+that is how long the thread stalled. The results are written as Json:
+
+    requests         network requests finished, including retries
+    throughput       requests per second until all were answered
+    latency          p50 and p95 of the request latencies (ms)
+    stalls           mean, p95 and max lateness of the GUI thread (ms)
+
+    python loadtest.py --duration 10 --rate 50 --latency 20 --error-rate 0.02
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+from PySide6.QtCore import QCoreApplication, QElapsedTimer, QModelIndex, Qt, QTimer
+
+from paginatedresource import (ColorModel, PaginatedColorsResource,
+                               PaginatedColorUsersResource)
+from restservice import RestService
+
+
+DEFAULT_DURATION = 10  # s
+DEFAULT_RATE = 50  # operations per second
+HEARTBEAT_INTERVAL = 5  # ms
+STALL_THRESHOLD = 50  # ms
+DRAIN_TIMEOUT = 30  # s
+
+# Operations and their weights
+OPERATIONS = [("flipColors", 4), ("flipUsers", 2), ("update", 2), ("add", 1),
+              ("remove", 1)]
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def startServer(args):
+    """Start the mock server and return the process and its url"""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            "mockserver.py"),
+               "--items", str(args.items), "--page-size", str(args.page_size),
+               "--latency", str(args.latency), "--error-rate", str(args.error_rate)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Running on "):
+        process.kill()
+        sys.exit("The mock server failed to start")
+    return process, line.split()[2].rstrip("/")
+
+
+class StallMonitor:
+    """Records how late a timer on the GUI thread fires"""
+
+    def __init__(self):
+        self.stalls = []
+        self._elapsed = QElapsedTimer()
+        self._timer = QTimer()
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(HEARTBEAT_INTERVAL)
+        self._timer.timeout.connect(self._beat)
+
+    def start(self):
+        self._elapsed.start()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _beat(self):
+        self.stalls.append(max(0, self._elapsed.restart() - HEARTBEAT_INTERVAL))
+
+    def result(self):
+        return {"mean": sum(self.stalls) / len(self.stalls) if self.stalls else 0,
+                "p95": percentile(self.stalls, 95),
+                "max": max(self.stalls, default=0),
+                "overThreshold": sum(1 for s in self.stalls if s > STALL_THRESHOLD)}
+
+
+class LoadDriver:
+    """Issues random operations on the resources at a fixed rate"""
+
+    def __init__(self, url, args):
+        self.service = RestService()
+        self.users = PaginatedColorUsersResource()
+        self.users.path = "/api/users"
+        self.colors = PaginatedColorsResource()
+        self.colors.path = "/api/unknown"
+        self.service.appendResource(self.users)
+        self.service.appendResource(self.colors)
+        self.service.url = url
+        self.service.componentComplete()
+
+        self.random = random.Random(args.seed)
+        self.operations = {name: 0 for name, _ in OPERATIONS}
+        self.failedMutations = 0
+        self.colors.mutationFailed.connect(self._mutationFailed)
+        self.remaining = args.duration * args.rate
+        self.timer = QTimer()
+        self.timer.setInterval(1000 // args.rate)
+        self.timer.timeout.connect(self.step)
+
+    def _mutationFailed(self, id, error):
+        self.failedMutations += 1
+
+    def idle(self):
+        return (self.remaining <= 0 and self.service.m_manager.isIdle()
+                and not self.colors.hasPendingWrites())
+
+    def step(self):
+        if self.remaining <= 0:
+            self.timer.stop()
+            return
+        self.remaining -= 1
+        names = [name for name, _ in OPERATIONS]
+        weights = [weight for _, weight in OPERATIONS]
+        operation = self.random.choices(names, weights)[0]
+        self.operations[operation] += 1
+        getattr(self, operation)()
+
+    def flipColors(self):
+        self.colors.page = self.random.randint(1, max(1, self.colors.pages))
+
+    def flipUsers(self):
+        self.users.page = self.random.randint(1, max(1, self.users.pages))
+
+    def _randomColorId(self):
+        model = self.colors.model
+        count = model.rowCount(QModelIndex())
+        if not count:
+            return None
+        return model.data(model.index(self.random.randrange(count)), ColorModel.IdRole)
+
+    def update(self):
+        id = self._randomColorId()
+        if id is not None:
+            self.colors.update({"name": f"renamed {self.random.random():.4f}"}, id)
+
+    def add(self):
+        self.colors.add({"name": "added", "color": "#336699",
+                         "pantone_value": "00-0000"})
+
+    def remove(self):
+        id = self._randomColorId()
+        if id is not None:
+            self.colors.remove(id)
+
+
+def run(url, args):
+    app = QCoreApplication.instance()
+    driver = LoadDriver(url, args)
+    monitor = StallMonitor()
+    driver.users.refreshCurrentPage()
+    driver.colors.refreshCurrentPage()
+
+    start = time.perf_counter()
+    monitor.start()
+    driver.timer.start()
+    drain = QTimer()
+    drain.timeout.connect(lambda: app.quit() if driver.idle()
+                          or time.perf_counter() - start > args.duration + DRAIN_TIMEOUT
+                          else None)
+    drain.start(10)
+    app.exec()
+    elapsed = time.perf_counter() - start
+    monitor.stop()
+
+    scheduler = driver.service.m_manager
+    return {"elapsed": elapsed,
+            "drained": driver.idle(),
+            "operations": driver.operations,
+            "requests": scheduler.completed(),
+            "throughput": scheduler.completed() / elapsed,
+            "latency": {"p50": scheduler.latencyPercentile(50),
+                        "p95": scheduler.latencyPercentile(95)},
+            "deduplicated": scheduler.deduplicated(),
+            "retries": scheduler.retries(),
+            "failedMutations": driver.failedMutations,
+            "stalls": monitor.result()}
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="Color palette client load test")
+    arg_parser.add_argument("--duration", type=int, default=DEFAULT_DURATION,
+                            help="time to issue operations in s")
+    arg_parser.add_argument("--rate", type=int, default=DEFAULT_RATE,
+                            help="operations per second")
+    arg_parser.add_argument("--items", type=int, default=60,
+                            help="number of users and colors on the server")
+    arg_parser.add_argument("--page-size", type=int, default=6)
+    arg_parser.add_argument("--latency", type=int, default=0,
+                            help="delay of each server response in ms")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0,
+                            help="fraction of failing server responses")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="Json file for the results")
+    args = arg_parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    server, url = startServer(args)
+    try:
+        result = run(url, args)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {"settings": vars(args), "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "result": result}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,254 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""A local stand-in for the reqres.in style service used by the demo.
+
+It serves the paginated users and colors under /api/users and
+/api/unknown, including creating, updating and deleting items, and
+/api/login and /api/logout. The page size, a latency added to each
+response and a rate of failing requests can be configured:
+
+    python mockserver.py --port 8080 --page-size 6 --latency 50 --error-rate 0.05
+
+Then select http://127.0.0.1:8080 in the demo. Pages carry an ETag and
+are answered with 304 Not Modified when revalidated."""
+
+import hashlib
+import json
+import random
+import sys
+from argparse import ArgumentParser
+from collections import deque
+
+from PySide6.QtCore import QByteArray, QCoreApplication, QElapsedTimer, QObject, Qt, QTimer
+from PySide6.QtNetwork import QAbstractSocket, QHostAddress, QHttpHeaders, QTcpServer, QTcpSocket
+from PySide6.QtHttpServer import QHttpServer, QHttpServerRequest, QHttpServerResponder, QHttpServerResponse
+
+
+DEFAULT_PAGE_SIZE = 6
+DEFAULT_ITEMS = 12
+ERROR_STATUS = QHttpServerResponder.StatusCode.ServiceUnavailable
+
+Method = QHttpServerRequest.Method
+StatusCode = QHttpServerResponder.StatusCode
+
+
+def createUsers(count):
+    return [{"id": i, "email": f"user{i}@example.com",
+             "first_name": f"First{i}", "last_name": f"Last{i}",
+             "avatar": f"https://reqres.in/img/faces/{(i - 1) % 12 + 1}-image.jpg"}
+            for i in range(1, count + 1)]
+
+
+def createColors(count):
+    return [{"id": i, "name": f"color {i}", "year": 2000 + i,
+             "color": f"#{(i * 0x2f4f6b) % 0xffffff:06x}",
+             "pantone_value": f"{10 + i}-{1000 + i}"}
+            for i in range(1, count + 1)]
+
+
+class DelayedConnection(QObject):
+    """Forwards a client connection to the server, holding back what the
+       server answers for a latency. The server keeps answering other
+       requests meanwhile, the answers of a connection stay in order."""
+
+    def __init__(self, client, port, latency, parent=None):
+        super().__init__(parent)
+        self.m_latency = latency  # ms
+        self.m_pending = deque()  # (due time, data)
+        self.m_closing = False
+        self.m_elapsed = QElapsedTimer()
+        self.m_elapsed.start()
+        self.m_timer = QTimer(self)
+        self.m_timer.setSingleShot(True)
+        self.m_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.m_timer.timeout.connect(self._flush)
+
+        self.m_client = client
+        client.setParent(self)
+        self.m_backend = QTcpSocket(self)
+        client.readyRead.connect(self._forward)
+        client.disconnected.connect(self._clientDisconnected)
+        self.m_backend.connected.connect(self._forward)
+        self.m_backend.readyRead.connect(self._received)
+        self.m_backend.disconnected.connect(self._backendDisconnected)
+        self.m_backend.connectToHost(QHostAddress(QHostAddress.SpecialAddress.LocalHost), port)
+
+    def _forward(self):
+        if self.m_backend.state() == QAbstractSocket.SocketState.ConnectedState:
+            self.m_backend.write(self.m_client.readAll())
+
+    def _received(self):
+        self.m_pending.append((self.m_elapsed.elapsed() + self.m_latency,
+                               self.m_backend.readAll()))
+        if not self.m_timer.isActive():
+            self._schedule()
+
+    def _schedule(self):
+        if self.m_pending:
+            self.m_timer.start(max(0, self.m_pending[0][0] - self.m_elapsed.elapsed()))
+        elif self.m_closing:
+            self.m_client.disconnectFromHost()
+
+    def _flush(self):
+        now = self.m_elapsed.elapsed()
+        while self.m_pending and self.m_pending[0][0] <= now:
+            self.m_client.write(self.m_pending.popleft()[1])
+        self._schedule()
+
+    def _backendDisconnected(self):
+        self.m_closing = True
+        if not self.m_timer.isActive():
+            self._schedule()
+
+    def _clientDisconnected(self):
+        self.m_timer.stop()
+        self.m_backend.abort()
+        self.deleteLater()
+
+
+class MockRestServer(QObject):
+    """Answers all requests in an after request handler. The Python
+       bindings of QHttpServer only support route handlers returning text,
+       the handler can set the status and headers of any response."""
+
+    def __init__(self, pageSize=DEFAULT_PAGE_SIZE, items=DEFAULT_ITEMS,
+                 latency=0, errorRate=0.0, parent=None):
+        super().__init__(parent)
+        self.m_pageSize = pageSize
+        self.m_latency = latency  # ms
+        self.m_errorRate = errorRate
+        self.m_random = random.Random(0)
+        self.m_resources = {"/api/users": createUsers(items),
+                            "/api/unknown": createColors(items)}
+        self.m_nextId = items + 1
+        self.m_requests = 0
+        self.m_server = QHttpServer(self)
+        # The server does not keep a reference to the handler
+        self.m_handler = self.respond
+        self.m_server.addAfterRequestHandler(self, self.m_handler)
+        self.m_tcpServer = QTcpServer(self)
+        # The Python bindings of QHttpServer answer a request before its
+        # handler returns. With a latency, clients connect to a front
+        # server instead, which delays the answers without blocking.
+        self.m_frontServer = QTcpServer(self) if latency else None
+        if self.m_frontServer:
+            self.m_frontServer.newConnection.connect(self._acceptConnections)
+
+    def listen(self, port=0):
+        if self.m_frontServer:
+            if not self.m_frontServer.listen(QHostAddress.SpecialAddress.LocalHost, port):
+                return False
+            port = 0
+        if (not self.m_tcpServer.listen(QHostAddress.SpecialAddress.LocalHost, port)
+                or not self.m_server.bind(self.m_tcpServer)):
+            return False
+        return True
+
+    def serverPort(self):
+        return (self.m_frontServer or self.m_tcpServer).serverPort()
+
+    def _acceptConnections(self):
+        while self.m_frontServer.hasPendingConnections():
+            DelayedConnection(self.m_frontServer.nextPendingConnection(),
+                              self.m_tcpServer.serverPort(), self.m_latency, self)
+
+    def requests(self):
+        return self.m_requests
+
+    def respond(self, request, response):
+        self.m_requests += 1
+        if self.m_errorRate and self.m_random.random() < self.m_errorRate:
+            (status, body) = (ERROR_STATUS, {"error": "injected failure"})
+        else:
+            (status, body) = self.handle(request)
+
+        headers = QHttpHeaders()
+        data = QByteArray()
+        if body is not None:
+            data = QByteArray(json.dumps(body).encode())
+            etag = f'"{hashlib.blake2b(data.data(), digest_size=8).hexdigest()}"'
+            headers.append(QHttpHeaders.WellKnownHeader.ETag, etag)
+            if (request.method() == Method.Get
+                    and bytes(request.value(b"If-None-Match")).decode() == etag):
+                (status, data) = (StatusCode.NotModified, QByteArray())
+        headers.append(QHttpHeaders.WellKnownHeader.ContentType, "application/json")
+        mockResponse = QHttpServerResponse(QByteArray(b"application/json"), data, status)
+        mockResponse.setHeaders(headers)
+        response.swap(mockResponse)
+
+    def handle(self, request):
+        """Return the status and Json body for a request"""
+        path = request.url().path().rstrip("/")
+        method = request.method()
+        if path == "/api/login" and method == Method.Post:
+            return (StatusCode.Ok, {"token": "QpwL5tke4Pnpja7X4"})
+        if path == "/api/logout" and method == Method.Post:
+            return (StatusCode.Ok, {})
+
+        (collection, _, id) = path.rpartition("/")
+        if path in self.m_resources:
+            items = self.m_resources[path]
+            if method == Method.Get:
+                return (StatusCode.Ok, self.page(items, request.query()))
+            if method == Method.Post:
+                item = {**self.readJson(request), "id": self.m_nextId}
+                self.m_nextId += 1
+                items.append(item)
+                return (StatusCode.Created, item)
+        elif collection in self.m_resources and id.isdigit():
+            items = self.m_resources[collection]
+            item = next((item for item in items if item["id"] == int(id)), None)
+            if item is None:
+                return (StatusCode.NotFound, {})
+            if method == Method.Get:
+                return (StatusCode.Ok, {"data": item})
+            if method in (Method.Put, Method.Patch):
+                item.update(self.readJson(request))
+                item["id"] = int(id)
+                return (StatusCode.Ok, item)
+            if method == Method.Delete:
+                items.remove(item)
+                return (StatusCode.NoContent, None)
+        return (StatusCode.NotFound, {})
+
+    def page(self, items, query):
+        perPage = int(query.queryItemValue("per_page") or self.m_pageSize)
+        page = int(query.queryItemValue("page") or 1)
+        totalPages = max(1, (len(items) + perPage - 1) // perPage)
+        start = (page - 1) * perPage
+        return {"page": page, "per_page": perPage, "total": len(items),
+                "total_pages": totalPages, "data": items[start:start + perPage]}
+
+    @staticmethod
+    def readJson(request):
+        try:
+            data = json.loads(request.body().data() or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="Color palette mock REST server")
+    arg_parser.add_argument("--port", type=int, default=0,
+                            help="port to listen on, any free one by default")
+    arg_parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    arg_parser.add_argument("--items", type=int, default=DEFAULT_ITEMS,
+                            help="number of users and colors")
+    arg_parser.add_argument("--latency", type=int, default=0,
+                            help="delay of each response in ms")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0,
+                            help="fraction of requests failing with 503")
+    args = arg_parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    server = MockRestServer(args.page_size, args.items, args.latency, args.error_rate)
+    if not server.listen(args.port):
+        print("Server failed to listen on a port.", file=sys.stderr)
+        sys.exit(-1)
+
+    print(f"Running on http://127.0.0.1:{server.serverPort()}/ (Press CTRL+\\ to quit)",
+          flush=True)
+    sys.exit(app.exec())
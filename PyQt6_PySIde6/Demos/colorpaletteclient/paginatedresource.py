@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import sys
+from collections import OrderedDict
 from dataclasses import dataclass
-from PySide6.QtCore import (QAbstractListModel, QByteArray,
-                            QUrlQuery, Property, Signal, Slot, Qt)
+from functools import partial
+from PySide6.QtCore import (QAbstractListModel, QByteArray, QModelIndex,
+                            QTimer, QUrlQuery, Property, Signal, Slot, Qt)
 from PySide6.QtQml import QmlAnonymous, QmlElement
 
 from abstractresource import AbstractResource
@@ -18,6 +20,120 @@ QML_IMPORT_MAJOR_VERSION = 1
 totalPagesField = "total_pages"
 currentPageField = "page"
 
+PAGE_CACHE_SIZE = 32  # pages
+HTTP_NOT_MODIFIED = 304
+# Changes of an item made within this time are coalesced into one request
+WRITE_BATCH_DELAY = 50  # ms
+
+
+@dataclass
+class CachedPage:
+    etag: bytes
+    json_object: dict
+
+
+class PageCache:
+    """An LRU cache of page responses keyed by (service url, path, page)"""
+
+    def __init__(self, size=PAGE_CACHE_SIZE):
+        self._size = size
+        self._pages = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._pages
+
+    def get(self, key):
+        page = self._pages.get(key)
+        if page is not None:
+            self._pages.move_to_end(key)
+        return page
+
+    def insert(self, key, page):
+        self._pages[key] = page
+        self._pages.move_to_end(key)
+        while len(self._pages) > self._size:
+            self._pages.popitem(last=False)
+
+    def invalidate(self, url, path):
+        """Remove all pages of a resource"""
+        for key in [k for k in self._pages if k[:2] == (url, path)]:
+            del self._pages[key]
+
+
+@dataclass
+class Write:
+    """A local change of a resource item, shown until the server confirmed
+       it and the page was reloaded. Added items have negative ids until
+       the server assigned one."""
+    op: str  # "add", "update" or "remove"
+    id: int
+    data: dict
+    state: str = "queued"  # "queued", "sent" or "done"
+
+
+def _apply_writes(json_list, writes):
+    items = list(json_list)
+    for write in writes:
+        if write.op == "add":
+            if all(e["id"] != write.id for e in items):
+                items.append({**write.data, "id": write.id})
+        elif write.op == "update":
+            items = [{**e, **write.data, "id": e["id"]} if e["id"] == write.id else e
+                     for e in items]
+        else:
+            items = [e for e in items if e["id"] != write.id]
+    return items
+
+
+def _update_rows(model, rows, new_rows):
+    """Update the list rows of model to new_rows, matching items by their id.
+       Only the removed, moved, inserted and changed rows are signalled,
+       so that views keep the delegates of unchanged items."""
+    new_ids = {r.id for r in new_rows}
+    last = len(rows) - 1
+    while last >= 0:
+        if rows[last].id in new_ids:
+            last -= 1
+            continue
+        first = last
+        while first > 0 and rows[first - 1].id not in new_ids:
+            first -= 1
+        model.beginRemoveRows(QModelIndex(), first, last)
+        del rows[first:last + 1]
+        model.endRemoveRows()
+        last = first - 1
+
+    # rows[:i] matches new_rows[:i] after each step
+    old_ids = {r.id for r in rows}
+    changed = []
+    i = 0
+    while i < len(new_rows):
+        new = new_rows[i]
+        if new.id not in old_ids:
+            last = i
+            while last + 1 < len(new_rows) and new_rows[last + 1].id not in old_ids:
+                last += 1
+            model.beginInsertRows(QModelIndex(), i, last)
+            rows[i:i] = new_rows[i:last + 1]
+            model.endInsertRows()
+            i = last + 1
+            continue
+        if rows[i].id != new.id:
+            j = next(j for j in range(i + 1, len(rows)) if rows[j].id == new.id)
+            model.beginMoveRows(QModelIndex(), j, j, QModelIndex(), i)
+            rows.insert(i, rows.pop(j))
+            model.endMoveRows()
+        if rows[i] != new:
+            rows[i] = new
+            changed.append(i)
+        i += 1
+
+    first = 0
+    for k, row in enumerate(changed):
+        if k + 1 == len(changed) or changed[k + 1] != row + 1:
+            model.dataChanged.emit(model.index(changed[first]), model.index(row))
+            first = k + 1
+
 
 @dataclass
 class ColorUser:
@@ -35,18 +151,15 @@ class ColorUserModel (QAbstractListModel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._users = []
+        self._avatars = {}  # email -> avatar
 
     def clear(self):
         self.set_data([])
 
     def set_data(self, json_list):
-        if not self._users and not json_list:
-            return
-        self.beginResetModel()
-        self._users.clear()
-        for e in json_list:
-            self._users.append(ColorUser(int(e["id"]), e["email"], e["avatar"]))
-        self.endResetModel()
+        users = [ColorUser(int(e["id"]), e["email"], e["avatar"]) for e in json_list]
+        _update_rows(self, self._users, users)
+        self._avatars = {u.email: u.avatar for u in users}
 
     def roleNames(self):
         roles = {
@@ -71,10 +184,7 @@ class ColorUserModel (QAbstractListModel):
         return None
 
     def avatarForEmail(self, email):
-        for e in self._users:
-            if e.email == email:
-                return e.avatar
-        return ""
+        return self._avatars.get(email, "")
 
 
 @dataclass
@@ -100,14 +210,9 @@ class ColorModel (QAbstractListModel):
         self.set_data([])
 
     def set_data(self, json_list):
-        if not self._colors and not json_list:
-            return
-        self.beginResetModel()
-        self._colors.clear()
-        for e in json_list:
-            self._colors.append(Color(int(e["id"]), e["color"],
-                                      e["name"], e["pantone_value"]))
-        self.endResetModel()
+        colors = [Color(int(e["id"]), e["color"], e["name"], e["pantone_value"])
+                  for e in json_list]
+        _update_rows(self, self._colors, colors)
 
     def roleNames(self):
         roles = {
@@ -143,6 +248,8 @@ class PaginatedResource(AbstractResource):
     dataUpdated = Signal()
     pageUpdated = Signal()
     pagesUpdated = Signal()
+    # Emitted with the item id and the error when a change was rolled back
+    mutationFailed = Signal(int, str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -151,6 +258,17 @@ class PaginatedResource(AbstractResource):
         # The default page we request if the user hasn't set otherwise
         self.m_currentPage = 1
         self.m_path = ""
+        self.m_cache = PageCache()
+        self.m_prefetching = set()
+        # The items of the current page as last received from the server
+        self.m_pageData = []
+        # Local changes, applied on top of m_pageData
+        self.m_writes = []
+        self.m_nextTempId = -1
+        self.m_flushTimer = QTimer(self)
+        self.m_flushTimer.setSingleShot(True)
+        self.m_flushTimer.setInterval(WRITE_BATCH_DELAY)
+        self.m_flushTimer.timeout.connect(self.flushWrites)
 
     def _clearModel(self):
         pass
@@ -182,25 +300,80 @@ class PaginatedResource(AbstractResource):
         self.pageUpdated.emit()
         self.refreshCurrentPage()
 
-    @Slot()
-    def refreshCurrentPage(self):
+    def _pageKey(self, page):
+        return (self.m_api.baseUrl().toString(), self.m_path, page)
+
+    def _pageRequest(self, page):
         query = QUrlQuery()
-        query.addQueryItem("page", str(self.m_currentPage))
+        query.addQueryItem("page", str(page))
         request = self.m_api.createRequest(self.m_path, query)
-        self.m_manager.get(request, self, self.refreshCurrentPageReply)
+        # Revalidate cached pages, the server answers 304 if unchanged
+        cached = self.m_cache.get(self._pageKey(page))
+        if cached and cached.etag:
+            request.setRawHeader(b"If-None-Match", cached.etag)
+        return request
 
-    def refreshCurrentPageReply(self, reply):
+    @Slot()
+    def refreshCurrentPage(self):
+        # Show a cached page right away and update it once revalidated
+        page = self.m_currentPage
+        cached = self.m_cache.get(self._pageKey(page))
+        if cached:
+            self.refreshRequestFinished(cached.json_object)
+        request = self._pageRequest(page)
+        self.m_manager.get(request, self, partial(self.refreshCurrentPageReply, page))
+
+    def _storeReply(self, page, reply):
+        """Return the Json object of a page reply, or None, and whether it
+           changed. Successful replies are cached."""
+        key = self._pageKey(page)
+        cached = self.m_cache.get(key)
+        if reply.httpStatus() == HTTP_NOT_MODIFIED:
+            return (cached.json_object if cached else None, False)
         if not reply.isSuccess():
             print("PaginatedResource: ", reply.errorString(), file=sys.stderr)
+            return (None, False)
         (json, error) = reply.readJson()
-        if json:
-            self.refreshRequestFinished(json)
-        else:
-            self.refreshRequestFailed()
-
-    def refreshRequestFinished(self, json):
+        if not json or not json.isObject():
+            return (None, False)
         json_object = json.object()
-        self._populateModel(json_object["data"])
+        etag = reply.networkReply().rawHeader("ETag").data()
+        self.m_cache.insert(key, CachedPage(etag, json_object))
+        return (json_object, True)
+
+    def refreshCurrentPageReply(self, page, reply):
+        (json_object, changed) = self._storeReply(page, reply)
+        if page != self.m_currentPage:
+            return  # the page was changed while the request was pending
+        if json_object is None and reply.httpStatus() == HTTP_NOT_MODIFIED:
+            # The page was invalidated while it was revalidated, load it again
+            self.refreshCurrentPage()
+            return
+        if json_object is None:
+            self.refreshRequestFailed()
+            return
+        if self._settleWrites() or changed:
+            self.refreshRequestFinished(json_object)
+        self.prefetchNeighbours()
+
+    def prefetchNeighbours(self):
+        """Load the pages next to the current one into the cache"""
+        for page in (self.m_currentPage + 1, self.m_currentPage - 1):
+            key = self._pageKey(page)
+            if page < 1 or page > self.m_pages or key in self.m_cache or key in self.m_prefetching:
+                continue
+            self.m_prefetching.add(key)
+            request = self._pageRequest(page)
+            self.m_manager.get(request, self, partial(self.prefetchReply, page, key))
+
+    def prefetchReply(self, page, key, reply):
+        self.m_prefetching.discard(key)
+        if key == self._pageKey(page):
+            self._storeReply(page, reply)
+
+    def refreshRequestFinished(self, json_object):
+        self.m_pageData = json_object["data"]
+        self._populateModel(_apply_writes(self.m_pageData, self.m_writes))
         self.m_pages = int(json_object[totalPagesField])
         self.m_currentPage = int(json_object[currentPageField])
         self.pageUpdated.emit()
@@ -211,7 +384,7 @@ class PaginatedResource(AbstractResource):
         if self.m_currentPage != 1:
             # A failed refresh. If we weren't on page 1, try that.
             # Last resource on currentPage might have been deleted, causing a failure
-            self.setPage(1)
+            self.page = 1
         else:
             # Refresh failed and we we're already on page 1 => clear data
             self.m_pages = 0
@@ -221,30 +394,115 @@ class PaginatedResource(AbstractResource):
 
     @Slot("QVariantMap", int)
     def update(self, data, id):
-        request = self.m_api.createRequest(f"{self.m_path}/{id}")
-        self.m_manager.put(request, self, self.updateReply)
-
-    def updateReply(self, reply):
-        if reply.isSuccess():
-            self.refreshCurrentPage()
+        self._queueWrite(Write("update", id, dict(data)))
 
     @Slot("QVariantMap")
     def add(self, data):
-        request = self.m_api.createRequest(self.m_path)
-        self.m_manager.post(request, data, self, self.updateReply)
+        self._queueWrite(Write("add", self.m_nextTempId, dict(data)))
+        self.m_nextTempId -= 1
 
     @Slot(int)
     def remove(self, id):
-        request = self.m_api.createRequest(f"{self.m_path}/{id}")
-        self.m_manager.deleteResource(request, self, self.updateReply)
+        self._queueWrite(Write("remove", id, {}))
+
+    def _queueWrite(self, write):
+        """Show a change right away and queue it for the server. Queued
+           changes of the same item are coalesced."""
+        if write.op != "add" and write.id < 0 and all(w.id != write.id for w in self.m_writes):
+            return  # the added item is gone
+        queued = next((w for w in self.m_writes
+                       if w.id == write.id and w.state == "queued"), None)
+        if queued is None:
+            self.m_writes.append(write)
+        elif write.op == "update" and queued.op != "remove":
+            queued.data.update(write.data)
+        elif write.op == "remove" and queued.op == "add":
+            self.m_writes.remove(queued)
+        elif write.op == "remove":
+            queued.op = "remove"
+        self._populateModel(_apply_writes(self.m_pageData, self.m_writes))
+        self.dataUpdated.emit()
+        self.m_flushTimer.start()
+
+    @Slot()
+    def flushWrites(self):
+        """Send the queued changes. The service has no batch endpoint, so
+           each changed item still takes a request of its own. A change
+           waits for a previous one of the same item to be answered, so
+           that they are applied in order, changes of added items for the
+           server to assign their id."""
+        inFlight = {w.id for w in self.m_writes if w.state == "sent"}
+        for write in self.m_writes:
+            if (write.state != "queued" or write.id in inFlight
+                    or (write.id < 0 and write.op != "add")):
+                continue
+            write.state = "sent"
+            inFlight.add(write.id)
+            callback = partial(self.writeReply, write)
+            if write.op == "add":
+                request = self.m_api.createRequest(self.m_path)
+                self.m_manager.post(request, write.data, self, callback)
+            elif write.op == "update":
+                request = self.m_api.createRequest(f"{self.m_path}/{write.id}")
+                self.m_manager.put(request, write.data, self, callback)
+            else:
+                request = self.m_api.createRequest(f"{self.m_path}/{write.id}")
+                self.m_manager.deleteResource(request, self, callback)
+
+    def writeReply(self, write, reply):
+        tempId = write.id
+        if reply.isSuccess():
+            write.state = "done"
+            if write.op == "add":
+                (json, error) = reply.readJson()
+                if json and json.isObject() and "id" in json.object():
+                    write.id = int(json.object()["id"])
+                for w in self.m_writes:
+                    if w.id == tempId:
+                        w.id = write.id
+                self._populateModel(_apply_writes(self.m_pageData, self.m_writes))
+        else:
+            error = reply.errorString() or f"HTTP status {reply.httpStatus()}"
+            print("PaginatedResource: ", error, file=sys.stderr)
+            self.m_writes = [w for w in self.m_writes
+                             if w is not write and (tempId >= 0 or w.id != tempId)]
+            self._populateModel(_apply_writes(self.m_pageData, self.m_writes))
+            self.mutationFailed.emit(tempId, error)
+            self.dataUpdated.emit()
+
+        # Send the changes which waited for this one
+        if any(w.state == "queued" for w in self.m_writes):
+            self.m_flushTimer.start()
+
+        # Reload the page once the whole batch is through
+        if all(w.state == "done" for w in self.m_writes):
+            self.m_cache.invalidate(self.m_api.baseUrl().toString(), self.m_path)
+            self.refreshCurrentPage()
+
+    def hasPendingWrites(self):
+        return any(w.state != "done" for w in self.m_writes)
+
+    def _settleWrites(self):
+        """Drop the confirmed changes once no others are pending, the page
+           received from the server reflects them. Return whether any were
+           dropped."""
+        if not self.m_writes or any(w.state != "done" for w in self.m_writes):
+            return False
+        self.m_writes.clear()
+        return True
 
 
 @QmlElement
 class PaginatedColorUsersResource(PaginatedResource):
 
+    avatarsChanged = Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.m_model = ColorUserModel(self)
+        # Avatars of the users seen on any page, by email
+        self.m_avatars = {}
+        self.m_avatarRequests = set()
 
     @Property(ColorUserModel, constant=True)
     def model(self):
@@ -255,10 +513,43 @@ class PaginatedColorUsersResource(PaginatedResource):
 
     def _populateModel(self, json_list):
         self.m_model.set_data(json_list)
+        self._indexAvatars(json_list)
+
+    def _indexAvatars(self, json_list):
+        for e in json_list:
+            self.m_avatars[e["email"]] = e["avatar"]
 
     @Slot(str, result=str)
     def avatarForEmail(self, email):
-        return self.m_model.avatarForEmail(email)
+        avatar = self.m_model.avatarForEmail(email) or self.m_avatars.get(email, "")
+        if not avatar and email:
+            self.fetchAvatars(email)
+        return avatar
+
+    def fetchAvatars(self, email):
+        """Look for a user outside the current page in the other pages,
+           avatarsChanged is emitted as they arrive"""
+        request = (self.m_api.baseUrl().toString(), email)
+        if self.m_pages == 0 or request in self.m_avatarRequests:
+            return
+        self.m_avatarRequests.add(request)
+        for page in range(1, self.m_pages + 1):
+            if page == self.m_currentPage:
+                continue
+            cached = self.m_cache.get(self._pageKey(page))
+            if cached:
+                self._indexAvatars(cached.json_object["data"])
+            else:
+                self.m_manager.get(self._pageRequest(page), self,
+                                   partial(self.avatarPageReply, page))
+        if email in self.m_avatars:
+            self.avatarsChanged.emit()
+
+    def avatarPageReply(self, page, reply):
+        (json_object, changed) = self._storeReply(page, reply)
+        if json_object and "data" in json_object:
+            self._indexAvatars(json_object["data"])
+            self.avatarsChanged.emit()
 
 
 @QmlElement
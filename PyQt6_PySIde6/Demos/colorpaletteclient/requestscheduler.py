@@ -0,0 +1,241 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""A process-wide scheduler for the requests of all RestServices.
+
+It shares one QNetworkAccessManager, and so its connections, limits the
+concurrent requests per host, lets identical GET requests in flight share
+one reply and retries failed idempotent requests with exponential backoff.
+Its interface follows the parts of QRestAccessManager used by the
+resources."""
+
+from collections import deque
+from dataclasses import dataclass, field
+
+from shiboken6 import isValid
+from PySide6.QtCore import (QByteArray, QCoreApplication, QElapsedTimer,
+                            QJsonDocument, QJsonParseError, QObject, QTimer,
+                            Signal)
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+
+MAX_PER_HOST = 4  # concurrent requests
+MAX_PER_HOST_HTTP2 = 16  # concurrent requests, multiplexed on one connection
+MAX_RETRIES = 3
+RETRY_DELAY = 250  # ms, doubled for each retry
+LATENCY_SAMPLES = 200
+
+RETRY_STATUS = {429, 502, 503, 504}
+RETRY_ERRORS = {QNetworkReply.NetworkError.ConnectionRefusedError,
+                QNetworkReply.NetworkError.RemoteHostClosedError,
+                QNetworkReply.NetworkError.TimeoutError,
+                QNetworkReply.NetworkError.TemporaryNetworkFailureError,
+                QNetworkReply.NetworkError.NetworkSessionFailedError,
+                QNetworkReply.NetworkError.ProxyTimeoutError}
+
+_instance = None
+
+
+class RestReply:
+    """The finished reply of a scheduled request, with the interface of
+       QRestReply. The body is buffered, so that requests sharing the reply
+       can each read it."""
+
+    def __init__(self, reply, body):
+        self._reply = reply
+        self._body = body
+
+    def networkReply(self):
+        return self._reply
+
+    def error(self):
+        return self._reply.error()
+
+    def hasError(self):
+        return self._reply.error() != QNetworkReply.NetworkError.NoError
+
+    def errorString(self):
+        return self._reply.errorString() if self.hasError() else ""
+
+    def httpStatus(self):
+        status = self._reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        return int(status) if status else 0
+
+    def isHttpStatusSuccess(self):
+        return 200 <= self.httpStatus() < 300
+
+    def isSuccess(self):
+        return not self.hasError() and self.isHttpStatusSuccess()
+
+    def readBody(self):
+        return QByteArray(self._body)
+
+    def readText(self):
+        return self._body.data().decode("utf-8", errors="replace")
+
+    def readJson(self):
+        error = QJsonParseError()
+        json = QJsonDocument.fromJson(self._body, error)
+        if error.error != QJsonParseError.ParseError.NoError:
+            return (None, error)
+        return (json, error)
+
+
+@dataclass
+class Job:
+    verb: bytes
+    request: QNetworkRequest
+    data: QByteArray
+    host: str
+    key: tuple = None  # set for GET requests, which can be shared
+    callbacks: list = field(default_factory=list)  # [(context, callback)]
+    attempts: int = 0
+
+
+class RequestScheduler(QObject):
+
+    statisticsChanged = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.m_qnam = QNetworkAccessManager(self)
+        self.m_qnam.setAutoDeleteReplies(True)
+        self.m_queues = {}  # host -> deque of jobs
+        self.m_running = {}  # host -> number of requests in flight
+        self.m_http2Hosts = set()
+        self.m_gets = {}  # key -> queued or running GET job
+        self.m_jobs = 0  # scheduled requests not answered yet
+        self.m_inFlight = 0
+        self.m_completed = 0
+        self.m_deduplicated = 0
+        self.m_retries = 0
+        self.m_latencies = deque(maxlen=LATENCY_SAMPLES)  # ms
+
+    @staticmethod
+    def instance():
+        global _instance
+        if _instance is None:
+            _instance = RequestScheduler(QCoreApplication.instance())
+        return _instance
+
+    def networkAccessManager(self):
+        return self.m_qnam
+
+    def isIdle(self):
+        return self.m_jobs == 0
+
+    def inFlight(self):
+        return self.m_inFlight
+
+    def completed(self):
+        """Return the number of network requests finished, including retries"""
+        return self.m_completed
+
+    def deduplicated(self):
+        return self.m_deduplicated
+
+    def retries(self):
+        return self.m_retries
+
+    def latencyPercentile(self, percent):
+        """Return the percentile of the recent request latencies in ms"""
+        if not self.m_latencies:
+            return 0.0
+        latencies = sorted(self.m_latencies)
+        return latencies[min(len(latencies) - 1, len(latencies) * percent // 100)]
+
+    def get(self, request, context, callback):
+        self._schedule(b"GET", request, None, context, callback)
+
+    def post(self, request, data, context, callback):
+        self._schedule(b"POST", request, data, context, callback)
+
+    def put(self, request, data, context, callback):
+        self._schedule(b"PUT", request, data, context, callback)
+
+    def deleteResource(self, request, context, callback):
+        self._schedule(b"DELETE", request, None, context, callback)
+
+    def _schedule(self, verb, request, data, context, callback):
+        url = request.url()
+        host = f"{url.scheme()}://{url.authority()}"
+        key = None
+        if verb == b"GET":
+            key = (url.toString(), tuple((name.data(), value.data())
+                                         for name, value in request.headers().toListOfPairs()))
+            job = self.m_gets.get(key)
+            if job is not None:
+                job.callbacks.append((context, callback))
+                self.m_deduplicated += 1
+                self.statisticsChanged.emit()
+                return
+
+        request = QNetworkRequest(request)
+        request.setAttribute(QNetworkRequest.Attribute.Http2AllowedAttribute, True)
+        job = Job(verb, request, self._encode(request, data), host, key,
+                  [(context, callback)])
+        if key is not None:
+            self.m_gets[key] = job
+        self.m_jobs += 1
+        self.m_queues.setdefault(host, deque()).append(job)
+        self._startNext(host)
+
+    @staticmethod
+    def _encode(request, data):
+        if data is None:
+            return QByteArray()
+        if isinstance(data, dict):
+            request.setHeader(QNetworkRequest.KnownHeaders.ContentTypeHeader,
+                              "application/json")
+            return QJsonDocument(data).toJson(QJsonDocument.JsonFormat.Compact)
+        return QByteArray(data)
+
+    def _startNext(self, host):
+        limit = MAX_PER_HOST_HTTP2 if host in self.m_http2Hosts else MAX_PER_HOST
+        queue = self.m_queues.get(host)
+        while queue and self.m_running.get(host, 0) < limit:
+            job = queue.popleft()
+            self.m_running[host] = self.m_running.get(host, 0) + 1
+            self.m_inFlight += 1
+            job.attempts += 1
+            timer = QElapsedTimer()
+            timer.start()
+            reply = self.m_qnam.sendCustomRequest(job.request, job.verb, job.data)
+            reply.finished.connect(lambda job=job, reply=reply, timer=timer:
+                                   self._finished(job, reply, timer))
+        self.statisticsChanged.emit()
+
+    def _finished(self, job, reply, timer):
+        self.m_running[job.host] -= 1
+        self.m_inFlight -= 1
+        self.m_completed += 1
+        self.m_latencies.append(timer.elapsed())
+        if reply.attribute(QNetworkRequest.Attribute.Http2WasUsedAttribute):
+            self.m_http2Hosts.add(job.host)
+
+        if self._shouldRetry(job, reply):
+            self.m_retries += 1
+            delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+            QTimer.singleShot(delay, self, lambda job=job: self._retry(job))
+        else:
+            if job.key is not None:
+                del self.m_gets[job.key]
+            self.m_jobs -= 1
+            restReply = RestReply(reply, reply.readAll())
+            for context, callback in job.callbacks:
+                if context is None or isValid(context):
+                    callback(restReply)
+        self._startNext(job.host)
+
+    def _shouldRetry(self, job, reply):
+        if job.attempts > MAX_RETRIES or job.verb == b"POST":
+            return False
+        if reply.error() == QNetworkReply.NetworkError.OperationCanceledError:
+            return False
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        return reply.error() in RETRY_ERRORS or status in RETRY_STATUS
+
+    def _retry(self, job):
+        self.m_queues.setdefault(job.host, deque()).append(job)
+        self._startNext(job.host)
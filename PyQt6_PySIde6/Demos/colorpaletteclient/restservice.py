@@ -3,10 +3,10 @@
 from __future__ import annotations
 
 from PySide6.QtCore import Property, Signal, ClassInfo
-from PySide6.QtNetwork import (QNetworkAccessManager, QRestAccessManager,
-                               QNetworkRequestFactory, QSslSocket)
+from PySide6.QtNetwork import QNetworkRequestFactory, QSslSocket
 from PySide6.QtQml import QmlElement, QPyQmlParserStatus, ListProperty
 from abstractresource import AbstractResource
+from requestscheduler import RequestScheduler
 
 QML_IMPORT_NAME = "ColorPalette"
 QML_IMPORT_MAJOR_VERSION = 1
@@ -17,13 +17,14 @@ QML_IMPORT_MAJOR_VERSION = 1
 class RestService(QPyQmlParserStatus):
 
     urlChanged = Signal()
+    statisticsChanged = Signal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.m_resources = []
-        self.m_qnam = QNetworkAccessManager()
-        self.m_qnam.setAutoDeleteReplies(True)
-        self.m_manager = QRestAccessManager(self.m_qnam)
+        # All services share the connections and limits of one scheduler
+        self.m_manager = RequestScheduler.instance()
+        self.m_manager.statisticsChanged.connect(self.statisticsChanged)
         self.m_serviceApi = QNetworkRequestFactory()
 
     @Property(str, notify=urlChanged)
@@ -40,6 +41,26 @@ class RestService(QPyQmlParserStatus):
     def sslSupported(self):
         return QSslSocket.supportsSsl()
 
+    @Property(int, notify=statisticsChanged)
+    def inFlight(self):
+        return self.m_manager.inFlight()
+
+    @Property(int, notify=statisticsChanged)
+    def deduplicated(self):
+        return self.m_manager.deduplicated()
+
+    @Property(int, notify=statisticsChanged)
+    def retries(self):
+        return self.m_manager.retries()
+
+    @Property(float, notify=statisticsChanged)
+    def latencyP50(self):
+        return self.m_manager.latencyPercentile(50)
+
+    @Property(float, notify=statisticsChanged)
+    def latencyP95(self):
+        return self.m_manager.latencyPercentile(95)
+
     def classBegin(self):
         pass
 
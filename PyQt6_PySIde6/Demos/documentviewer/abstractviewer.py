@@ -2,14 +2,105 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
-from PySide6.QtCore import QObject
+import inspect
+import os
 
-from PySide6.QtWidgets import (QDialog, QMenu)
+from PySide6.QtCore import QDir, QObject, QThreadPool, QTimer
+
+from PySide6.QtWidgets import (QDialog, QMenu, QProgressBar, QToolButton)
 from PySide6.QtCore import Signal, Slot
 from PySide6.QtPrintSupport import QPrinter, QPrintDialog
 
 
 MENU_NAME = "qtFileMenu"
+LOAD_CHUNK_SIZE = 4 * 1024 * 1024  # bytes
+
+# Kinds of load failures
+READ_ERROR = "read"
+PARSE_ERROR = "parse"
+
+
+class LoadCanceled(Exception):
+    pass
+
+
+class LoadParseError(Exception):
+    """Raised by a load function for a file which was read but has invalid
+       contents. Its message is shown as it is."""
+
+
+class DocumentLoader(QObject):
+    """Runs a load function on the global thread pool.
+
+    The load function is called as load(loader) in a worker thread. It can
+    read the file with readAll(), report progress with setProgress() and
+    return any object, which the finished signal hands to the GUI thread.
+    It raises LoadParseError for invalid contents. QObjects returned must have been moved to the GUI thread."""
+
+    progress = Signal(int)
+    finished = Signal(object)
+    failed = Signal(str, str)  # kind, message
+    canceled = Signal()
+
+    def __init__(self, fileName, load, parent=None):
+        super().__init__(parent)
+        self._fileName = fileName
+        self._load = load
+        self._canceled = False
+        self._percent = -1
+
+    def fileName(self):
+        return self._fileName
+
+    def start(self):
+        QThreadPool.globalInstance().start(self._run)
+
+    def cancel(self):
+        self._canceled = True
+
+    def isCanceled(self):
+        return self._canceled
+
+    def setProgress(self, done, total):
+        """Report progress, raises LoadCanceled if the load was canceled"""
+        if self._canceled:
+            raise LoadCanceled()
+        percent = done * 100 // total if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            self.progress.emit(percent)
+
+    def readAll(self):
+        """Read the whole file in chunks, reporting progress"""
+        with open(self._fileName, "rb") as f:
+            total = os.fstat(f.fileno()).st_size
+            data = bytearray(total)
+            view = memoryview(data)
+            done = 0
+            while done < total:
+                read = f.readinto(view[done:done + LOAD_CHUNK_SIZE])
+                if not read:
+                    break
+                done += read
+                self.setProgress(done, total)
+        return data[:done] if done < total else data
+
+    def _run(self):
+        try:
+            result = self._load(self)
+        except LoadCanceled:
+            self.canceled.emit()
+            return
+        except LoadParseError as e:
+            self.failed.emit(PARSE_ERROR, f"{e}")
+            return
+        except Exception as e:  # Reported to the status bar by the viewer
+            self.failed.emit(READ_ERROR, f"{e}")
+            return
+        if self._canceled:
+            self.canceled.emit()
+        else:
+            self.finished.emit(result)
 
 
 class AbstractViewer(QObject):
@@ -28,9 +119,21 @@ class AbstractViewer(QObject):
         self._printingEnabled = False
         self._actions = []
         self._fileMenu = None
+        self._loader = None
+        self._loaded = None
+        self._loadSteps = None
+        self._loadStepTimer = QTimer(self)
+        self._loadStepTimer.setInterval(0)
+        self._loadStepTimer.timeout.connect(self._onLoadStep)
+        self._loadProgress = None
+        self._loadCancel = None
+        self._connections = []
 
     def __del__(self):
-        self.cleanup()
+        try:
+            self.cleanup()
+        except RuntimeError:
+            pass  # Qt objects already deleted on shutdown
 
     def viewerName(self):
         return ""
@@ -49,6 +152,20 @@ class AbstractViewer(QObject):
         self._widget = widget
         self._uiAssets_mainWindow = mainWindow
 
+    def canReopen(self, file):
+        """Return whether file can be shown in the existing widget and
+           user interface, see reopen()"""
+        return False
+
+    def reopen(self, file):
+        """Show another file, keeping the widget, menus and toolbars"""
+        self.cancelLoading()
+        self._file = file
+        self.openDocument()
+
+    def openDocument(self):
+        pass
+
     def isEmpty(self):
         return not self.hasContent()
 
@@ -121,11 +238,28 @@ class AbstractViewer(QObject):
         self._menus.append(menu)
         return menu
 
+    def connectNavigation(self, back, forward):
+        """Connect the Back and Forward actions until cleanup()"""
+        self._connections.append(self._uiAssets_back.triggered.connect(back))
+        self._connections.append(self._uiAssets_forward.triggered.connect(forward))
+
     def cleanup(self):
         # delete all objects created by the viewer which need to be displayed
         # and therefore parented on MainWindow
+        self.cancelLoading()
         if self._file:
             self._file = None
+        for connection in self._connections:
+            QObject.disconnect(connection)
+        self._connections.clear()
+        for menu in self._menus:
+            self.menuBar().removeAction(menu.menuAction())
+            menu.deleteLater()
+        for bar in self._toolBars:
+            self.mainWindow().removeToolBar(bar)
+            bar.deleteLater()
+        if self._fileMenu in self._menus:
+            self._fileMenu = None
         self._menus.clear()
         self._toolBars.clear()
 
@@ -142,6 +276,119 @@ class AbstractViewer(QObject):
         self._fileMenu.setObjectName(MENU_NAME)
         return self._fileMenu
 
+    def loadInBackground(self, load, loaded):
+        """Run load(loader) on a worker thread and pass its result to
+           loaded(result) in the GUI thread, showing progress in the
+           status bar. See DocumentLoader. Work which has to be done in the
+           GUI thread can be split up by making loaded a generator yielding
+           its progress in percent, it is resumed between events."""
+        self.cancelLoading()
+        self._loaded = loaded
+        self._loader = DocumentLoader(self._file.fileName(), load, self)
+        self._loader.progress.connect(self._onLoadProgress)
+        self._loader.finished.connect(self._onLoadFinished)
+        self._loader.failed.connect(self._onLoadFailed)
+        self._loader.canceled.connect(self._onLoadCanceled)
+
+        self._loadProgress = QProgressBar()
+        self._loadProgress.setRange(0, 0)  # busy until progress is reported
+        self._loadProgress.setMaximumWidth(200)
+        self._loadCancel = QToolButton()
+        self._loadCancel.setText("Cancel")
+        self._loadCancel.clicked.connect(self.cancelLoading)
+        self.statusBar().addPermanentWidget(self._loadProgress)
+        self.statusBar().addPermanentWidget(self._loadCancel)
+
+        file_name = QDir.toNativeSeparators(self._file.fileName())
+        self.statusMessage(f"Loading {file_name}...", "open", 0)
+        self._loader.start()
+
+    def isLoading(self):
+        return self._loader is not None
+
+    @Slot()
+    def cancelLoading(self):
+        if not self._loader:
+            return
+        self._loader.cancel()
+        self._finishLoading()
+        self.statusMessage("Loading canceled.", "open")
+
+    def _finishLoading(self):
+        self._loader = None
+        self._loaded = None
+        self._loadStepTimer.stop()
+        if self._loadSteps:
+            self._loadSteps.close()
+            self._loadSteps = None
+        for widget in (self._loadProgress, self._loadCancel):
+            if widget:
+                widget.hide()
+                widget.deleteLater()
+        self._loadProgress = None
+        self._loadCancel = None
+
+    def _isCurrentLoader(self):
+        return self._loader is not None and self.sender() is self._loader
+
+    @Slot(int)
+    def _onLoadProgress(self, percent):
+        if self._isCurrentLoader():
+            self._loadProgress.setRange(0, 100)
+            self._loadProgress.setValue(percent)
+
+    @Slot(object)
+    def _onLoadFinished(self, result):
+        if not self._isCurrentLoader():
+            return
+        loaded = self._loaded
+        if inspect.isgeneratorfunction(loaded):
+            self._loadSteps = loaded(result)
+            self._loadStepTimer.start()
+            return
+        self._finishLoading()
+        loaded(result)
+        self.documentLoaded.emit(self._file.fileName())
+
+    @Slot()
+    def _onLoadStep(self):
+        try:
+            percent = next(self._loadSteps)
+        except StopIteration:
+            self._loadSteps = None
+            self._finishLoading()
+            self.documentLoaded.emit(self._file.fileName())
+            return
+        except LoadParseError as e:
+            self._loadSteps = None
+            self._failLoading(PARSE_ERROR, f"{e}")
+            return
+        except Exception as e:
+            self._loadSteps = None
+            self._failLoading(READ_ERROR, f"{e}")
+            return
+        self._loadProgress.setRange(0, 100)
+        self._loadProgress.setValue(percent)
+
+    @Slot(str, str)
+    def _onLoadFailed(self, kind, message):
+        if self._isCurrentLoader():
+            self._failLoading(kind, message)
+
+    def _failLoading(self, kind, message):
+        file_name = QDir.toNativeSeparators(self._file.fileName())
+        self._finishLoading()
+        if kind == PARSE_ERROR:
+            self.statusMessage(message, "open")
+        else:
+            self.statusMessage(f"Cannot read file {file_name}:\n{message}", "open")
+
+    @Slot()
+    def _onLoadCanceled(self):
+        if self._isCurrentLoader():
+            self._finishLoading()
+            self.statusMessage("Loading canceled.", "open")
+
     @Slot()
     def print_(self):
         type = "Printing"
@@ -0,0 +1,248 @@
+# Copyright (C) 2023 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Measure how long the Document Viewer takes to open files.
+
+Synthetic text, Json, image and Pdf files of increasing size are
+generated and each is opened by MainWindow.openFile() in a fresh
+interpreter on the offscreen platform, recording
+
+    importTime       cold import of the application modules (s)
+    openTime         until the viewer finished loading (s)
+    firstPaintTime   until the document was first painted (s)
+    peakRss          peak resident memory of the process (MB)
+    scroll           repaint time per scroll step (ms, mean and max)
+
+The results are written as Json, to compare versions:
+
+    python benchmark.py --sizes 1,10,100 --output results.json
+"""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import SUPPRESS, ArgumentParser
+
+# Start of the cold import of Qt and the application
+START = time.perf_counter()
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import (QColor, QGuiApplication, QImage, QLinearGradient,  # noqa: E402
+                           QPageSize, QPainter, QPdfWriter)
+from PySide6.QtCore import QEvent, QObject, QPoint  # noqa: E402
+
+
+KINDS = ["txt", "json", "jpg", "png", "pdf"]
+DEFAULT_SIZES = "1,10,100"  # MB
+PDF_PAGES_PER_MB = 10
+SCROLL_STEPS = 50
+CASE_TIMEOUT = 600  # s
+PAINT_TIMEOUT = 10  # s
+
+
+def writeText(fileName, size):
+    line = "The quick brown fox jumps over the lazy dog, line {0}\n"
+    with open(fileName, "w") as f:
+        written = i = 0
+        while written < size:
+            written += f.write(line.format(i))
+            i += 1
+
+
+def writeJson(fileName, size):
+    with open(fileName, "w") as f:
+        f.write("[")
+        written = i = 0
+        while written < size:
+            item = {"id": i, "name": f"item {i}", "tags": ["alpha", "beta"],
+                    "point": {"x": i * 0.5, "y": -i}}
+            written += f.write(("," if i else "") + json.dumps(item))
+            i += 1
+        f.write("]")
+
+
+def writeImage(fileName, size):
+    """Write an image of about size bytes when decoded"""
+    width = int((size / 4 * 1.5) ** 0.5)
+    height = max(1, size // 4 // width)
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    painter = QPainter(image)
+    gradient = QLinearGradient(QPoint(0, 0), QPoint(width, height))
+    gradient.setColorAt(0, QColor("darkblue"))
+    gradient.setColorAt(1, QColor("orange"))
+    painter.fillRect(image.rect(), gradient)
+    painter.end()
+    image.save(fileName)
+
+
+def writePdf(fileName, size):
+    pages = max(1, size * PDF_PAGES_PER_MB // (1024 * 1024))
+    writer = QPdfWriter(fileName)
+    writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+    writer.setResolution(72)
+    painter = QPainter(writer)
+    for page in range(pages):
+        if page:
+            writer.newPage()
+        painter.drawText(72, 72, f"Page {page + 1}")
+        painter.drawEllipse(72, 144, 300, 300)
+    painter.end()
+
+
+WRITERS = {"txt": writeText, "json": writeJson, "jpg": writeImage,
+           "png": writeImage, "pdf": writePdf}
+
+
+def peakRss():
+    """Return the peak resident memory of the process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PaintWatcher(QObject):
+    """Records the time of the first paint event of the watched widgets
+       once ready() returns True"""
+
+    def __init__(self, widgets, ready):
+        super().__init__()
+        self.time = None
+        self._ready = ready
+        for widget in widgets:
+            widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint and self.time is None and self._ready():
+            self.time = time.perf_counter()
+        return False
+
+
+def scrollLatency(app, area):
+    """Return the mean and maximum time in ms to scroll and repaint"""
+    bar = area.verticalScrollBar()
+    if bar.maximum() <= bar.minimum():
+        return None
+    times = []
+    for step in range(SCROLL_STEPS):
+        value = bar.minimum() + (bar.maximum() - bar.minimum()) * step // SCROLL_STEPS
+        start = time.perf_counter()
+        bar.setValue(value)
+        area.viewport().repaint()
+        times.append((time.perf_counter() - start) * 1000)
+        app.processEvents()
+    return {"mean": sum(times) / len(times), "max": max(times)}
+
+
+def runCase(fileName):
+    """Open fileName in a MainWindow and return the measurements"""
+    from PySide6.QtWidgets import QAbstractScrollArea, QApplication
+    from PySide6.QtCore import QCoreApplication, QEventLoop
+    from mainwindow import MainWindow
+    from imageviewer.imageviewer import ImageViewer
+    result = {"importTime": time.perf_counter() - START}
+
+    app = QApplication([])
+    QCoreApplication.setOrganizationName("QtExamplesBenchmark")
+    QCoreApplication.setApplicationName("DocumentViewer")
+    window = MainWindow()
+    window.resize(1024, 768)
+    window.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    if not window.openFile(fileName):
+        result["error"] = "cannot open"
+        return result
+    viewer = window.viewer()
+    widget = viewer.widget()
+    area = widget if isinstance(widget, QAbstractScrollArea) else window.ui.scrollArea
+    loaded = [] if viewer.isLoading() else [time.perf_counter()]
+    viewer.documentLoaded.connect(lambda: loaded.append(time.perf_counter()))
+    watcher = PaintWatcher([widget, area.viewport()], lambda: bool(loaded))
+    while viewer.isLoading():
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+        time.sleep(0.001)
+    if not loaded:
+        result["error"] = "loading failed"
+        return result
+    result["openTime"] = loaded[0] - start
+    result["viewer"] = viewer.viewerName() or type(viewer).__name__
+
+    while watcher.time is None and time.perf_counter() - loaded[0] < PAINT_TIMEOUT:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+        time.sleep(0.001)
+    result["firstPaintTime"] = watcher.time - start if watcher.time else None
+
+    if isinstance(viewer, ImageViewer):
+        viewer.setScaleFactor(1.0)
+        app.processEvents()
+    result["scroll"] = scrollLatency(app, area)
+    result["peakRss"] = peakRss()
+    return result
+
+
+def runCaseProcess(fileName):
+    """Run a case in a fresh interpreter, for cold imports and its own
+       peak memory"""
+    command = [sys.executable, os.path.abspath(__file__), "--case", fileName]
+    try:
+        process = subprocess.run(command, capture_output=True, text=True,
+                                 timeout=CASE_TIMEOUT,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+    except subprocess.TimeoutExpired:
+        return {"error": "timeout"}
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"error": process.stderr.strip().splitlines()[-1:] or process.returncode}
+
+
+def versions():
+    import PySide6
+    from PySide6.QtCore import qVersion
+    return {"python": platform.python_version(), "pyside": PySide6.__version__,
+            "qt": qVersion(), "platform": platform.platform()}
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="Document Viewer open benchmark")
+    arg_parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                            help="comma separated file sizes in MB")
+    arg_parser.add_argument("--kinds", default=",".join(KINDS),
+                            help="comma separated file kinds")
+    arg_parser.add_argument("--output", help="Json file for the results")
+    arg_parser.add_argument("--case", help=SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.case:
+        print(json.dumps(runCase(args.case)), flush=True)
+        sys.exit(0)
+
+    app = QGuiApplication([])
+    sizes = [int(size) for size in args.sizes.split(",")]
+    kinds = args.kinds.split(",")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for kind in kinds:
+                fileName = os.path.join(directory, f"corpus_{size}mb.{kind}")
+                WRITERS[kind](fileName, size * 1024 * 1024)
+                result = {"kind": kind, "size": size, "fileSize": os.path.getsize(fileName)}
+                result.update(runCaseProcess(fileName))
+                print(json.dumps(result), flush=True)
+                results.append(result)
+                os.remove(fileName)
+
+    report = {"versions": versions(), "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -4,12 +4,19 @@ from __future__ import annotations
 
 import math
 
-from PySide6.QtWidgets import QLabel
-from PySide6.QtCore import Qt, QDir, QSizeF
-from PySide6.QtGui import (QPixmap, QImageReader, QIcon, QKeySequence,
-                           QGuiApplication, QColorSpace, QPainter, QAction)
+from PySide6.QtCore import Qt, QDir, QSize, QSizeF
+from PySide6.QtGui import (QImageReader, QIcon, QKeySequence,
+                           QPainter, QAction)
 
 from abstractviewer import AbstractViewer
+from imageviewer.tiledimageview import (TILE_SIZE, PyramidTileSource,
+                                        ReaderTileSource, TiledImageView,
+                                        supportsTiledReading)
+
+
+# Formats without region decoding are decoded as a whole once, before being
+# split into tiles. A 20000x20000 scan takes 1.6 GB.
+DECODE_LIMIT = 2048  # MB
 
 
 def imageFormats():
@@ -24,17 +31,43 @@ def imageFormats():
     return result
 
 
-def msgOpen(name, image):
+def msgOpen(name, size, image):
     description = image.colorSpace().description() if image.colorSpace().isValid() else "unknown"
     return 'Opened "{0}", {1}x{2}, Depth: {3} ({4})'.format(
         QDir.toNativeSeparators(name),
-        image.width(),
-        image.height(),
+        size.width(),
+        size.height(),
         image.depth(),
         description
     )
 
 
+def loadImage(loader):
+    """Prepare the tiles of the image in a worker thread. Formats able to
+       decode scaled regions are read tile by tile on demand, others are
+       decoded once and split into a pyramid of tiles kept on disk."""
+    name = loader.fileName()
+    reader = QImageReader(name)
+    size = reader.size()
+    if size.isValid() and supportsTiledReading(name):
+        reader.setScaledSize(size.scaled(QSize(TILE_SIZE, TILE_SIZE),
+                                         Qt.AspectRatioMode.KeepAspectRatio))
+        preview = reader.read()
+        if preview.isNull():
+            raise IOError(reader.errorString())
+        return ReaderTileSource(name, size), msgOpen(name, size, preview)
+
+    image = reader.read()
+    if image.isNull():
+        raise IOError(reader.errorString())
+    message = msgOpen(name, image.size(), image)
+    source = PyramidTileSource(image.size())
+    source.cutImage(image, loader.setProgress)
+    del image
+    source.buildLevels(loader.setProgress)
+    return source, message
+
+
 class ImageViewer(AbstractViewer):
 
     def __init__(self):
@@ -42,16 +75,13 @@ class ImageViewer(AbstractViewer):
 
         self.formats = imageFormats()
         self.uiInitialized.connect(self.setupImageUi)
-        QImageReader.setAllocationLimit(1024)  # MB
+        QImageReader.setAllocationLimit(DECODE_LIMIT)
 
     def init(self, file, parent, mainWindow):
-        self.image_label = QLabel(parent)
-        self.image_label.setFrameShape(QLabel.Box)
-        self.image_label.setAlignment(Qt.AlignCenter)
-        self.image_label.setScaledContents(True)
+        self.image_view = TiledImageView(parent)
 
-        # AbstractViewer.init(file, self.image_label, mainWindow)
-        super().init(file, self.image_label, mainWindow)
+        # AbstractViewer.init(file, self.image_view, mainWindow)
+        super().init(file, self.image_view, mainWindow)
 
         self.tool_bar = self.addToolBar(self.tr("Images"))
 
@@ -80,8 +110,14 @@ class ImageViewer(AbstractViewer):
     def supportedMimeTypes(self):
         return self.formats
 
+    def canReopen(self, file):
+        return True
+
+    def openDocument(self):
+        self.openFile()
+
     def clear(self):
-        self.image_label.setPixmap(QPixmap())
+        self.image_view.setSource(None)
         self.max_scale_factor = self.min_scale_factor = 1
         self.initial_scale_factor = self.scale_factor = 1
 
@@ -89,45 +125,28 @@ class ImageViewer(AbstractViewer):
         self.openFile()
 
     def openFile(self):
+        self.disablePrinting()
+        self.loadInBackground(loadImage, self._imageLoaded)
 
-        QGuiApplication.setOverrideCursor(Qt.WaitCursor)
-
-        name = self._file.fileName()
-        reader = QImageReader(name)
-        orig_image = reader.read()
-
-        if orig_image.isNull():
-            self.statusMessage(f"Cannot read file {name}:\n{reader.errorString()}", "open")
-            self.disablePrinting()
-            QGuiApplication.restoreOverrideCursor()
-            return
-
+    def _imageLoaded(self, result):
+        source, message = result
         self.clear()
 
-        if orig_image.colorSpace().isValid():
-            image = orig_image.convertedToColorSpace(QColorSpace.SRgb)
-        else:
-            image = orig_image
-
-        device_pixel_ratio = self.image_label.devicePixelRatioF()
-        self.image_size = QSizeF(image.size()) / device_pixel_ratio
-
-        pixmap = QPixmap.fromImage(image)
-        pixmap.setDevicePixelRatio(device_pixel_ratio)
-        self.image_label.setPixmap(pixmap)
+        self.image_view.setSource(source)
+        self.image_size = QSizeF(self.image_view.imageSize())
 
-        target_size = self.image_label.parentWidget().size()
+        target_size = self.image_view.parentWidget().size()
         if (self.image_size.width() > target_size.width()
                 or self.image_size.height() > target_size.height()):
             self.initial_scale_factor = min(target_size.width() / self.image_size.width(),
                                             target_size.height() / self.image_size.height())
 
-        self.max_scale_factor = 3 * self.initial_scale_factor
+        # Tiles allow zooming large images up to their full resolution
+        self.max_scale_factor = max(3 * self.initial_scale_factor, 1)
         self.min_scale_factor = self.initial_scale_factor / 3
         self.doSetScaleFactor(self.initial_scale_factor)
 
-        self.statusMessage(msgOpen(name, orig_image))
-        QGuiApplication.restoreOverrideCursor()
+        self.statusMessage(message)
 
         self.maybeEnablePrinting()
 
@@ -137,8 +156,7 @@ class ImageViewer(AbstractViewer):
 
     def doSetScaleFactor(self, scaleFactor):
         self.scale_factor = scaleFactor
-        label_size = (self.image_size * self.scale_factor).toSize()
-        self.image_label.setFixedSize(label_size)
+        self.image_view.setScaleFactor(self.scale_factor)
         self.enableZoomActions()
 
     def zoomIn(self):
@@ -151,7 +169,7 @@ class ImageViewer(AbstractViewer):
         self.setScaleFactor(self.initial_scale_factor)
 
     def hasContent(self):
-        return not self.image_label.pixmap().isNull()
+        return self.image_view.source() is not None
 
     def enableZoomActions(self):
         self.reset_zoom_act.setEnabled(not math.isclose(self.scale_factor,
@@ -164,10 +182,10 @@ class ImageViewer(AbstractViewer):
             return
 
         painter = QPainter(printer)
-        pixmap = self.image_label.pixmap()
         rect = painter.viewport()
-        size = pixmap.size()
+        image = self.image_view.scaledImage(rect.size())
+        size = image.size()
         size.scale(rect.size(), Qt.KeepAspectRatio)
         painter.setViewport(rect.x(), rect.y(), size.width(), size.height())
-        painter.setWindow(pixmap.rect())
-        painter.drawPixmap(0, 0, pixmap)
+        painter.setWindow(image.rect())
+        painter.drawImage(0, 0, image)
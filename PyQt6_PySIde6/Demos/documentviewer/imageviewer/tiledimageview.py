@@ -0,0 +1,376 @@
+# Copyright (C) 2025 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""A widget showing large images as a pyramid of tiles.
+
+Level k of the pyramid has 1/2^k of the image resolution. Only tiles
+visible at the level matching the zoom are decoded, on a thread pool,
+and kept in a size bounded LRU cache."""
+
+import math
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import (QColorSpace, QImage, QImageIOHandler, QImageReader,
+                           QPainter, QPalette, QPixmap)
+from PySide6.QtCore import (QObject, QPoint, QRect, QRectF, QSize, QThreadPool, Qt,
+                            Signal, Slot)
+
+
+TILE_SIZE = 512  # pixels
+TILE_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+TILE_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+TILE_COMPRESSION = 1  # zlib level, fast enough to keep up with decoding
+
+
+def levelCount(size):
+    """Return the number of levels until the image fits into one tile"""
+    longest = max(size.width(), size.height(), 1)
+    return max(1, math.ceil(math.log2(longest / TILE_SIZE)) + 1)
+
+
+def levelSize(size, level):
+    factor = 1 << level
+    return QSize(max(1, math.ceil(size.width() / factor)),
+                 max(1, math.ceil(size.height() / factor)))
+
+
+def tileCount(size, level):
+    """Return the number of tile columns and rows of a level"""
+    size = levelSize(size, level)
+    return math.ceil(size.width() / TILE_SIZE), math.ceil(size.height() / TILE_SIZE)
+
+
+def tileRect(size, level, column, row):
+    """Return the rectangle of a tile in the coordinates of its level"""
+    rect = QRect(column * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+    return rect.intersected(QRect(QPoint(0, 0), levelSize(size, level)))
+
+
+def toSRgb(image):
+    if image.colorSpace().isValid():
+        return image.convertedToColorSpace(QColorSpace.SRgb)
+    return image
+
+
+def supportsTiledReading(fileName):
+    reader = QImageReader(fileName)
+    return reader.supportsOption(QImageIOHandler.ImageOption.ScaledClipRect)
+
+
+class ReaderTileSource:
+    """Decodes each tile from the file, for formats able to read a scaled
+       region directly (JPEG, for example)"""
+
+    def __init__(self, fileName, size):
+        self._fileName = fileName
+        self._size = size
+        self._levels = levelCount(size)
+
+    def size(self):
+        return self._size
+
+    def levels(self):
+        return self._levels
+
+    def tile(self, level, column, row):
+        reader = QImageReader(self._fileName)
+        reader.setScaledSize(levelSize(self._size, level))
+        reader.setScaledClipRect(tileRect(self._size, level, column, row))
+        return toSRgb(reader.read())
+
+    def scaledImage(self, size):
+        reader = QImageReader(self._fileName)
+        reader.setScaledSize(self._size.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+        return toSRgb(reader.read())
+
+
+class PyramidTileSource:
+    """Keeps the tiles of all levels in a temporary file, for formats which
+       can only be decoded as a whole. The pyramid is built once, in a worker
+       thread: cutImage() splits the decoded image into the tiles of the
+       first level, after which the image can be released, buildLevels()
+       scales each further tile down from the four tiles below it. Only the
+       tiles being scaled are kept in memory."""
+
+    def __init__(self, size):
+        self._size = size
+        self._levels = levelCount(size)
+        self._file = tempfile.TemporaryFile(prefix="tiles")
+        self._lock = threading.Lock()
+        self._offsets = {}  # (level, column, row) -> (offset, length)
+        self._total = sum(math.prod(tileCount(size, level)) for level in range(self._levels))
+
+    def size(self):
+        return self._size
+
+    def levels(self):
+        return self._levels
+
+    def cutImage(self, image, setProgress=None):
+        columns, rows = tileCount(self._size, 0)
+        for row in range(rows):
+            for column in range(columns):
+                tile = image.copy(tileRect(self._size, 0, column, row))
+                self._store((0, column, row), toSRgb(tile).convertToFormat(TILE_FORMAT))
+                if setProgress:
+                    setProgress(len(self._offsets), self._total)
+
+    def buildLevels(self, setProgress=None):
+        for level in range(1, self._levels):
+            columns, rows = tileCount(self._size, level)
+            for row in range(rows):
+                for column in range(columns):
+                    self._store((level, column, row), self._scaleDown(level, column, row))
+                    if setProgress:
+                        setProgress(len(self._offsets), self._total)
+
+    def _scaleDown(self, level, column, row):
+        """Combine the tiles of the level below covering a tile and scale
+           them down to it"""
+        rect = tileRect(self._size, level, column, row)
+        below = QRect(QPoint(0, 0), levelSize(self._size, level - 1))
+        area = QRect(rect.topLeft() * 2, rect.size() * 2).intersected(below)
+        combined = QImage(area.size(), TILE_FORMAT)
+        combined.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(combined)
+        for y in range(2):
+            for x in range(2):
+                key = (level - 1, 2 * column + x, 2 * row + y)
+                if key in self._offsets:
+                    painter.drawImage(x * TILE_SIZE, y * TILE_SIZE, self.tile(*key))
+        painter.end()
+        return combined.scaled(rect.size(), Qt.AspectRatioMode.IgnoreAspectRatio,
+                               Qt.TransformationMode.SmoothTransformation)
+
+    def _store(self, key, image):
+        data = zlib.compress(image.constBits(), TILE_COMPRESSION)
+        with self._lock:
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(data)
+        self._offsets[key] = (offset, len(data))
+
+    def tile(self, level, column, row):
+        offset, length = self._offsets[(level, column, row)]
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        rect = tileRect(self._size, level, column, row)
+        return QImage(zlib.decompress(data), rect.width(), rect.height(), TILE_FORMAT).copy()
+
+    def scaledImage(self, size):
+        """Return the coarsest level at least as large as size"""
+        level = 0
+        while level + 1 < self._levels:
+            next = levelSize(self._size, level + 1)
+            if next.width() < size.width() and next.height() < size.height():
+                break
+            level += 1
+        image = QImage(levelSize(self._size, level), TILE_FORMAT)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        columns, rows = tileCount(self._size, level)
+        for row in range(rows):
+            for column in range(columns):
+                painter.drawImage(column * TILE_SIZE, row * TILE_SIZE,
+                                  self.tile(level, column, row))
+        painter.end()
+        return image
+
+
+class TileCache:
+    """An LRU cache of pixmaps bounded by their size in bytes"""
+
+    def __init__(self, budget=TILE_CACHE_SIZE):
+        self._budget = budget
+        self._cost = 0
+        self._tiles = OrderedDict()
+
+    def get(self, key):
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+        return pixmap
+
+    def insert(self, key, pixmap):
+        self._cost += pixmap.width() * pixmap.height() * 4
+        self._tiles[key] = pixmap
+        while self._cost > self._budget and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._cost -= evicted.width() * evicted.height() * 4
+
+    def clear(self):
+        self._tiles.clear()
+        self._cost = 0
+
+
+class TileLoader(QObject):
+    """Decodes tiles on a thread pool, visible tiles first"""
+
+    # Emits (source, key) and the decoded tile
+    tileReady = Signal(object, QImage)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._source = None
+        self._pending = set()
+        self._wanted = frozenset()
+
+    def setSource(self, source):
+        self._source = source
+        self._pending.clear()
+        self._wanted = frozenset()
+
+    def request(self, keys):
+        """Decode the tiles for keys, in order. Pending tiles no longer
+           requested are skipped when their turn comes."""
+        self._wanted = frozenset(keys)
+        for priority, key in enumerate(reversed(keys)):
+            if key not in self._pending:
+                self._pending.add(key)
+                self._pool.start(lambda key=key, source=self._source: self._load(source, key),
+                                 priority)
+
+    def done(self, key):
+        self._pending.discard(key)
+
+    def _load(self, source, key):
+        if source is not self._source or key not in self._wanted:
+            self._pending.discard(key)
+            return
+        self.tileReady.emit((source, key), source.tile(*key))
+
+    def cancel(self):
+        self._source = None
+        self._pool.clear()
+        self._pending.clear()
+
+
+class TiledImageView(QWidget):
+    """Shows a tile source at a scale factor, painting visible tiles only"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._source = None
+        self._scale = 1.0
+        self._cache = TileCache()
+        self._loader = TileLoader(self)
+        self._loader.tileReady.connect(self._tileReady)
+
+    def source(self):
+        return self._source
+
+    def setSource(self, source):
+        self._loader.cancel()
+        self._cache.clear()
+        self._source = source
+        self._loader.setSource(source)
+        self.update()
+
+    def imageSize(self):
+        """Return the logical size of the image at scale 1"""
+        if not self._source:
+            return QSize()
+        size = self._source.size()
+        ratio = self.devicePixelRatioF()
+        return QSize(round(size.width() / ratio), round(size.height() / ratio))
+
+    def setScaleFactor(self, scale):
+        self._scale = scale
+        self.setFixedSize((self.imageSize() * scale))
+        self.update()
+
+    def level(self):
+        """Return the coarsest level providing enough device pixels"""
+        if self._scale >= 1:
+            return 0
+        level = int(math.floor(math.log2(1 / self._scale)))
+        return min(level, self._source.levels() - 1)
+
+    def _levelToWidget(self, level):
+        return (1 << level) * self._scale / self.devicePixelRatioF()
+
+    def paintEvent(self, event):
+        if not self._source:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        level = self.level()
+        factor = self._levelToWidget(level)
+        # Request tiles for all of the visible area, not just the exposed
+        # part, so that pending visible tiles are not dropped
+        exposed = self.visibleRegion().boundingRect()
+        if exposed.isEmpty():
+            exposed = event.rect()
+        size = self._source.size()
+        bounds = QRect(QPoint(0, 0), levelSize(size, level))
+        first = (int(exposed.left() / factor) // TILE_SIZE,
+                 int(exposed.top() / factor) // TILE_SIZE)
+        last = (min(int(exposed.right() / factor), bounds.right()) // TILE_SIZE,
+                min(int(exposed.bottom() / factor), bounds.bottom()) // TILE_SIZE)
+
+        center = exposed.center()
+        missing = []
+        for row in range(first[1], last[1] + 1):
+            for column in range(first[0], last[0] + 1):
+                rect = tileRect(size, level, column, row)
+                target = QRectF(rect.x() * factor, rect.y() * factor,
+                                rect.width() * factor, rect.height() * factor)
+                pixmap = self._cache.get((level, column, row))
+                if pixmap is not None:
+                    painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+                    continue
+                self._drawPlaceholder(painter, level, column, row, target)
+                distance = (target.center() - center).manhattanLength()
+                missing.append((distance, (level, column, row)))
+
+        # Keep the coarsest level around as placeholder for everything else
+        coarsest = (self._source.levels() - 1, 0, 0)
+        if self._cache.get(coarsest) is None:
+            missing.insert(0, (-1, coarsest))
+        missing.sort()
+        self._loader.request([key for _, key in missing])
+
+    def _drawPlaceholder(self, painter, level, column, row, target):
+        """Draw the part of a cached coarser tile covering the tile, or
+           a plain background"""
+        for coarser in range(level + 1, self._source.levels()):
+            shift = coarser - level
+            pixmap = self._cache.get((coarser, column >> shift, row >> shift))
+            if pixmap is None:
+                continue
+            part = TILE_SIZE >> shift
+            source = QRectF((column % (1 << shift)) * part, (row % (1 << shift)) * part,
+                            target.width() / self._levelToWidget(coarser),
+                            target.height() / self._levelToWidget(coarser))
+            painter.drawPixmap(target, pixmap, source)
+            return
+        painter.fillRect(target, self.palette().color(QPalette.ColorRole.Mid))
+
+    @Slot(object, QImage)
+    def _tileReady(self, tile, image):
+        source, key = tile
+        if source is not self._source:
+            return
+        self._loader.done(key)
+        if image.isNull():
+            return
+        self._cache.insert(key, QPixmap.fromImage(image))
+        level, column, row = key
+        factor = self._levelToWidget(level)
+        rect = tileRect(self._source.size(), level, column, row)
+        self.update(QRectF(rect.x() * factor, rect.y() * factor,
+                           rect.width() * factor, rect.height() * factor).toAlignedRect())
+
+    def scaledImage(self, size):
+        return self._source.scaledImage(size) if self._source else QImage()
+
+    def cleanup(self):
+        self._loader.cancel()
+        self._cache.clear()
@@ -0,0 +1,212 @@
+# Copyright (C) 2023 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Inverted index of the keys and scalar values of a Json document.
+
+Every node is identified by its path of rows from the root, which can be
+resolved to a model index, fetching lazily loaded children as needed.
+The index is built by a JsonIndexer on the thread pool and handed to the
+GUI thread in batches, so searching works while indexing proceeds."""
+
+import json
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+from jsonviewer.jsonscanner import (decodeValue, isContainer, iterChildren)
+
+
+INDEX_BATCH_SIZE = 20000
+MAX_PREFIX_EXPANSION = 100
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokens(text):
+    return set(_TOKEN.findall(text.lower()))
+
+
+def scalarText(value):
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def countItems(root):
+    """Return the number of items below a JsonTreeItem"""
+    count = 0
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        count += item.childCount()
+        stack.extend(item.child(row) for row in range(item.childCount()))
+    return count
+
+
+def walkTree(root, setProgress):
+    """Yield (rows, keys, value text) for all items below a JsonTreeItem
+       in document order. Containers have no value text."""
+    total = countItems(root)
+    done = 0
+    stack = [((), (), root, iter(range(root.childCount())))]
+    while stack:
+        rows, keys, item, children = stack[-1]
+        row = next(children, None)
+        if row is None:
+            stack.pop()
+            continue
+        child = item.child(row)
+        childRows = rows + (row,)
+        childKeys = keys + (f"{child.key()}",)
+        done += 1
+        setProgress(done, total)
+        if child.isContainer():
+            yield childRows, childKeys, None
+            stack.append((childRows, childKeys, child, iter(range(child.childCount()))))
+        else:
+            yield childRows, childKeys, scalarText(child.value())
+
+
+def walkBuffer(buffer, start, setProgress, limit=None):
+    """Yield (rows, keys, value text) for all values below the container
+       at start in a Json buffer, in document order, or for the first limit
+       values."""
+    size = len(buffer)
+    count = 0
+    stack = [((), (), enumerate(iterChildren(buffer, start)))]
+    while stack:
+        rows, keys, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        row, (key, begin, end) = child
+        childRows = rows + (row,)
+        childKeys = keys + (key,)
+        if count == limit:
+            return
+        count += 1
+        setProgress(begin, size)
+        if isContainer(buffer, begin):
+            yield childRows, childKeys, None
+            stack.append((childRows, childKeys, enumerate(iterChildren(buffer, begin))))
+        else:
+            yield childRows, childKeys, scalarText(decodeValue(buffer, begin, end))
+
+
+class IndexBatch:
+    """A part of the index built in the worker thread. Node ids are local
+       to the batch and get offset when merged into JsonSearchIndex."""
+
+    def __init__(self):
+        self.paths = []
+        self.labels = []
+        self.postings = defaultdict(list)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, rows, keys, text):
+        id = len(self.paths)
+        self.paths.append(rows)
+        self.labels.append(".".join(keys))
+        words = tokens(keys[-1])
+        if text is not None:
+            words |= tokens(text)
+        for word in words:
+            self.postings[word].append(id)
+
+
+class JsonSearchIndex:
+    """Maps tokens of keys and values to the nodes containing them"""
+
+    def __init__(self):
+        self._paths = []
+        self._labels = []
+        self._postings = {}
+        self._vocabulary = None
+
+    def __len__(self):
+        return len(self._paths)
+
+    def addBatch(self, batch):
+        offset = len(self._paths)
+        self._paths.extend(batch.paths)
+        self._labels.extend(batch.labels)
+        for word, ids in batch.postings.items():
+            self._postings.setdefault(word, []).extend(id + offset for id in ids)
+        self._vocabulary = None
+
+    def _lookup(self, word, prefix):
+        if not prefix:
+            return self._postings.get(word, [])
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        result = []
+        i = bisect_left(self._vocabulary, word)
+        end = min(i + MAX_PREFIX_EXPANSION, len(self._vocabulary))
+        while i < end and self._vocabulary[i].startswith(word):
+            result.extend(self._postings[self._vocabulary[i]])
+            i += 1
+        return result
+
+    def search(self, text, limit):
+        """Return (rows, label) of up to limit nodes containing all words of
+           text, in document order. The last word matches as a prefix."""
+        words = _TOKEN.findall(text.lower())
+        if not words:
+            return []
+        lists = [self._lookup(word, i == len(words) - 1) for i, word in enumerate(words)]
+        lists.sort(key=len)
+        ids = set(lists[0])
+        for other in lists[1:]:
+            if not ids:
+                break
+            ids.intersection_update(other)
+        return [(self._paths[id], self._labels[id]) for id in sorted(ids)[:limit]]
+
+
+class JsonIndexer(QObject):
+    """Runs a walk function on the global thread pool and emits the
+       resulting index in batches"""
+
+    batchReady = Signal(object)
+    progress = Signal(int)
+    finished = Signal()
+    failed = Signal(str)
+
+    def __init__(self, walk, parent=None):
+        super().__init__(parent)
+        self._walk = walk
+        self._canceled = False
+        self._percent = -1
+
+    def start(self):
+        QThreadPool.globalInstance().start(self._run)
+
+    def cancel(self):
+        self._canceled = True
+
+    def _setProgress(self, done, total):
+        percent = done * 100 // total if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            self.progress.emit(percent)
+
+    def _run(self):
+        batch = IndexBatch()
+        try:
+            for rows, keys, text in self._walk(self._setProgress):
+                if self._canceled:
+                    return
+                batch.add(rows, keys, text)
+                if len(batch) >= INDEX_BATCH_SIZE:
+                    self.batchReady.emit(batch)
+                    batch = IndexBatch()
+        except ValueError as e:
+            self.failed.emit(f"{e}")
+            return
+        if batch:
+            self.batchReady.emit(batch)
+        self.finished.emit()
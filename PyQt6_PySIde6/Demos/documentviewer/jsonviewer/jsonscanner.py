@@ -0,0 +1,119 @@
+# Copyright (C) 2023 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Minimal JSON structure scanner working on byte offsets.
+
+The scanner never builds Python objects for containers. It only locates
+the start and end offset of values inside a buffer (bytes or mmap), so
+that a model can decode children on demand."""
+
+import json
+import re
+
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"(?:[^"\\]+|\\.)*"', re.DOTALL)
+_STRUCTURE = re.compile(rb'["\[\]{}]')
+_SCALAR_END = re.compile(rb"[,\]} \t\n\r]")
+
+_QUOTE = ord('"')
+_OPEN_OBJECT = ord('{')
+_OPEN_ARRAY = ord('[')
+
+
+def skipWhitespace(buffer, pos):
+    """Return the offset of the first non-whitespace byte at or after pos"""
+    return _WHITESPACE.match(buffer, pos).end()
+
+
+def isContainer(buffer, pos):
+    """Return whether the value starting at pos is an object or an array"""
+    return pos < len(buffer) and buffer[pos] in (_OPEN_OBJECT, _OPEN_ARRAY)
+
+
+def isEmptyContainer(buffer, pos):
+    """Return whether the container starting at pos has no children"""
+    pos = skipWhitespace(buffer, pos + 1)
+    if pos >= len(buffer):
+        raise ValueError(f"Unexpected end of document at offset {pos}")
+    return buffer[pos] in b"]}"
+
+
+def valueEnd(buffer, pos):
+    """Return the offset just past the JSON value starting at pos"""
+    if pos >= len(buffer):
+        raise ValueError(f"Unexpected end of document at offset {pos}")
+
+    first = buffer[pos]
+    if first == _QUOTE:
+        match = _STRING.match(buffer, pos)
+        if not match:
+            raise ValueError(f"Unterminated string at offset {pos}")
+        return match.end()
+
+    if first in (_OPEN_OBJECT, _OPEN_ARRAY):
+        depth = 0
+        current = pos
+        while True:
+            match = _STRUCTURE.search(buffer, current)
+            if not match:
+                raise ValueError(f"Unterminated container at offset {pos}")
+            found = match.start()
+            char = buffer[found]
+            if char == _QUOTE:
+                string = _STRING.match(buffer, found)
+                if not string:
+                    raise ValueError(f"Unterminated string at offset {found}")
+                current = string.end()
+                continue
+            if char in (_OPEN_OBJECT, _OPEN_ARRAY):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return found + 1
+            current = found + 1
+
+    match = _SCALAR_END.search(buffer, pos)
+    return match.start() if match else len(buffer)
+
+
+def decodeValue(buffer, start, end):
+    """Decode the JSON value stored between start and end"""
+    return json.loads(bytes(buffer[start:end]))
+
+
+def iterChildren(buffer, pos):
+    """Yield (key, start, end) for each direct child of the container at pos.
+
+    Object members yield their key, array elements their index as string."""
+    isObject = buffer[pos] == _OPEN_OBJECT
+    closing = b"}" if isObject else b"]"
+    pos = skipWhitespace(buffer, pos + 1)
+    if buffer[pos:pos + 1] == closing:
+        return
+
+    index = 0
+    while True:
+        if isObject:
+            keyEnd = valueEnd(buffer, pos)
+            key = decodeValue(buffer, pos, keyEnd)
+            pos = skipWhitespace(buffer, keyEnd)
+            if buffer[pos:pos + 1] != b":":
+                raise ValueError(f"Expected ':' at offset {pos}")
+            pos = skipWhitespace(buffer, pos + 1)
+        else:
+            key = f"{index}"
+
+        end = valueEnd(buffer, pos)
+        yield key, pos, end
+        index += 1
+
+        pos = skipWhitespace(buffer, end)
+        separator = buffer[pos:pos + 1]
+        if separator == closing:
+            return
+        if separator != b",":
+            raise ValueError(f"Expected ',' or '{closing.decode()}' at offset {pos}")
+        pos = skipWhitespace(buffer, pos + 1)
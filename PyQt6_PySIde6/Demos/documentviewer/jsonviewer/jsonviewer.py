@@ -3,16 +3,34 @@
 from __future__ import annotations
 
 import json
+import mmap
+from functools import partial
 
 from PySide6.QtWidgets import (QLabel, QLineEdit, QListWidget,
                                QListWidgetItem, QMenu, QTreeView)
 from PySide6.QtGui import (QAction, QIcon, QKeySequence,
                            QPixmap, QTextDocument)
-from PySide6.QtCore import (QAbstractItemModel, QDir,
-                            QIODevice, QModelIndex,
-                            QPoint, QSize, Qt, Slot)
+from PySide6.QtCore import (QAbstractItemModel, QCoreApplication, QDir,
+                            QModelIndex, QObject, QPoint, QSize, Qt, QTimer, Signal,
+                            Slot)
 
-from abstractviewer import AbstractViewer
+from abstractviewer import AbstractViewer, LoadParseError
+from jsonviewer.jsonindex import (JsonIndexer, JsonSearchIndex, walkBuffer,
+                                  walkTree)
+from jsonviewer.jsonscanner import (decodeValue, isContainer,
+                                    isEmptyContainer, iterChildren,
+                                    skipWhitespace)
+
+
+# Files larger than this are opened in lazy mode: only the top level
+# structure is scanned and children are decoded when expanded.
+LAZY_LOAD_THRESHOLD = 32 * 1024 * 1024  # bytes
+FETCH_BATCH_SIZE = 1000
+MAX_SEARCH_RESULTS = 1000
+# Documents are indexed once searched. In lazy mode only the first values
+# are, as the index takes memory in proportion to what it covers.
+LAZY_INDEX_LIMIT = 500000  # values
+SEARCH_DELAY = 150  # ms
 
 
 def resizeToContents(tree):
@@ -27,6 +45,8 @@ class JsonTreeItem:
         self._value = None
         self._children = []
         self._parent = parent
+        self._row = 0
+        self._container = False
 
     def key(self):
         return self._key
@@ -35,6 +55,7 @@ class JsonTreeItem:
         return self._value
 
     def appendChild(self, item):
+        item._row = len(self._children)
         self._children.append(item)
 
     def child(self, row):
@@ -47,9 +68,11 @@ class JsonTreeItem:
         return len(self._children)
 
     def row(self):
-        if self._parent:
-            return self._parent._children.index(self)
-        return 0
+        return self._row
+
+    def isContainer(self):
+        """Return whether the item is an object or array, possibly empty"""
+        return self._container
 
     def setKey(self, key):
         self._key = key
@@ -61,6 +84,7 @@ class JsonTreeItem:
     def load(value, parent=None):
         rootItem = JsonTreeItem(parent)
         rootItem.setKey("root")
+        rootItem._container = isinstance(value, (dict, list))
 
         if isinstance(value, dict):
             for key, val in value.items():
@@ -80,6 +104,50 @@ class JsonTreeItem:
         return rootItem
 
 
+class LazyJsonTreeItem(JsonTreeItem):
+    """A tree item referring to a value by its offsets in a buffer.
+
+    Scalars are decoded immediately, containers only remember where they
+    start; their children are created batch by batch by fetch()."""
+
+    def __init__(self, buffer, start, end, parent=None):
+        super().__init__(parent)
+        self._start = start
+        self._end = end
+        self._pending = None
+        self._container = isContainer(buffer, start)
+        if self._container:
+            if not isEmptyContainer(buffer, start):
+                self._pending = iterChildren(buffer, start)
+        else:
+            self.setValue(decodeValue(buffer, start, end))
+
+    def start(self):
+        return self._start
+
+    def end(self):
+        return self._end
+
+    def canFetchMore(self):
+        return self._pending is not None
+
+    def fetch(self, buffer, count):
+        """Create up to count further children and return them"""
+        items = []
+        try:
+            for key, start, end in self._pending:
+                item = LazyJsonTreeItem(buffer, start, end, self)
+                item.setKey(key)
+                items.append(item)
+                if len(items) >= count:
+                    return items
+        except ValueError:
+            self._pending = None
+            raise
+        self._pending = None
+        return items
+
+
 class JsonItemModel(QAbstractItemModel):
 
     def columnCount(self, index=QModelIndex()):
@@ -100,6 +168,9 @@ class JsonItemModel(QAbstractItemModel):
         self._textItem = JsonTreeItem.load(doc) if doc else JsonTreeItem()
         self.endResetModel()
 
+    def rootItem(self):
+        return self._textItem
+
     def data(self, index, role):
         if not index.isValid():
             return None
@@ -160,6 +231,70 @@ class JsonItemModel(QAbstractItemModel):
         return parentItem.childCount()
 
 
+class LazyJsonItemModel(JsonItemModel):
+    """A JsonItemModel decoding a memory mapped document on demand.
+
+    Children are materialized through canFetchMore()/fetchMore() when the
+    view expands an index, so memory grows with what has been expanded
+    rather than with the size of the document."""
+
+    parseError = Signal(str)
+
+    def __init__(self, buffer, parent):
+        super().__init__(None, parent)
+        self._buffer = buffer
+        start = skipWhitespace(buffer, 0)
+        if not isContainer(buffer, start):
+            raise ValueError("Lazy loading requires an object or array root")
+        self.beginResetModel()
+        self._textItem = LazyJsonTreeItem(buffer, start, len(buffer))
+        self._textItem.setKey("root")
+        self.endResetModel()
+
+    def _item(self, parent):
+        return self.itemFromIndex(parent) if parent.isValid() else self._textItem
+
+    def hasChildren(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return False
+        item = self._item(parent)
+        return item.childCount() > 0 or item.canFetchMore()
+
+    def canFetchMore(self, parent):
+        return self._item(parent).canFetchMore()
+
+    def fetchMore(self, parent):
+        item = self._item(parent)
+        if not item.canFetchMore():
+            return
+        try:
+            items = item.fetch(self._buffer, FETCH_BATCH_SIZE)
+        except ValueError as e:
+            self.parseError.emit(f"{e}")
+            return
+        if not items:
+            return
+        first = item.childCount()
+        self.beginInsertRows(parent, first, first + len(items) - 1)
+        for child in items:
+            item.appendChild(child)
+        self.endInsertRows()
+
+
+def loadJsonDocument(loader):
+    """Read and parse the document and build its model in a worker thread"""
+    text = loader.readAll()
+    try:
+        text = text.decode("utf-8")
+        data = json.loads(text)
+    except ValueError as e:
+        file_name = QDir.toNativeSeparators(loader.fileName())
+        raise LoadParseError(f"Unable to parse Json document from {file_name}: {e}")
+    model = JsonItemModel(data, None)
+    model.moveToThread(QCoreApplication.instance().thread())
+    return text, model
+
+
 class JsonViewer(AbstractViewer):
 
     def __init__(self):
@@ -167,7 +302,15 @@ class JsonViewer(AbstractViewer):
         self._tree = QTreeView()
         self._toplevel = None
         self._text = ""
+        self._map = None
         self._searchKey = None
+        self._searchResults = None
+        self._searchTimer = QTimer(self)
+        self._searchTimer.setSingleShot(True)
+        self._searchTimer.setInterval(SEARCH_DELAY)
+        self._searchTimer.timeout.connect(self.search)
+        self._index = None
+        self._indexer = None
         self.uiInitialized.connect(self.setupJsonUi)
 
     def init(self, file, parent, mainWindow):
@@ -198,30 +341,19 @@ class JsonViewer(AbstractViewer):
         a.setPriority(QAction.Priority.LowPriority)
         a.setShortcut(QKeySequence.StandardKey.New)
 
-        if not self._searchKey:
-            self._searchKey = QLineEdit(tb)
+        self._searchKey = QLineEdit(tb)
 
         label = QLabel(tb)
         magnifier = QPixmap(":/icons/images/magnifier.png").scaled(QSize(28, 28))
         label.setPixmap(magnifier)
         tb.addWidget(label)
         tb.addWidget(self._searchKey)
-        self._searchKey.textEdited.connect(self._tree.keyboardSearch)
-
-        if not self.openJsonFile():
-            return
+        self._searchKey.setPlaceholderText("Search keys and values")
+        self._searchKey.textEdited.connect(self._searchTimer.start)
+        self._searchKey.returnPressed.connect(self.nextSearchResult)
 
-        # Populate bookmarks with toplevel
-        self._uiAssets_tabs.clear()
         self._toplevel = QListWidget(self._uiAssets_tabs)
         self._uiAssets_tabs.addTab(self._toplevel, "Bookmarks")
-        for i in range(0, self._tree.model().rowCount()):
-            index = self._tree.model().index(i, 0)
-            self._toplevel.addItem(index.data())
-            item = self._toplevel.item(i)
-            item.setData(Qt.ItemDataRole.UserRole, index)
-            item.setToolTip(f"Toplevel Item {i}")
-
         self._toplevel.setAcceptDrops(True)
         self._tree.setDragEnabled(True)
         self._tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
@@ -232,9 +364,54 @@ class JsonViewer(AbstractViewer):
         self._toplevel.customContextMenuRequested.connect(self.onBookmarkMenuRequested)
         self._tree.customContextMenuRequested.connect(self.onJsonMenuRequested)
 
+        self._searchResults = QListWidget(self._uiAssets_tabs)
+        self._uiAssets_tabs.addTab(self._searchResults, "Search")
+        self._searchResults.itemClicked.connect(self.onSearchResultClicked)
+
         # Connect back and forward
-        self._uiAssets_back.triggered.connect(self._back)
-        self._uiAssets_forward.triggered.connect(self._forward)
+        self.connectNavigation(self._back, self._forward)
+
+        self.openJsonFile()
+
+    def canReopen(self, file):
+        return True
+
+    def openDocument(self):
+        self.openJsonFile()
+
+    def setModel(self, model, buffer=None):
+        """Show model, deleting the model of a previous document and closing
+           the file mapped for it. buffer is the file mapped for model."""
+        self.cancelIndexing()
+        previous = self._tree.model()
+        self._tree.setModel(model)
+        if previous is not None and QObject.parent(previous) is self:
+            previous.deleteLater()
+        self._closeMap()
+        self._map = buffer
+
+    def _closeMap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def setupModelUi(self):
+        """Populate the overview, once the model has been set"""
+        # Populate bookmarks with toplevel. In lazy mode, this is the
+        # first batch of toplevel items.
+        model = self._tree.model()
+        if model.canFetchMore(QModelIndex()):
+            model.fetchMore(QModelIndex())
+        self._toplevel.clear()
+        for i in range(0, model.rowCount()):
+            index = model.index(i, 0)
+            self._toplevel.addItem(index.data())
+            item = self._toplevel.item(i)
+            item.setData(Qt.ItemDataRole.UserRole, index)
+            item.setToolTip(f"Toplevel Item {i}")
+
+        self._searchResults.clear()
+        self._index = None
 
     @Slot()
     def _back(self):
@@ -258,25 +435,163 @@ class JsonViewer(AbstractViewer):
 
     def openJsonFile(self):
         self.disablePrinting()
+        if self._file.size() > LAZY_LOAD_THRESHOLD:
+            self.openLazyJsonFile()
+        else:
+            self.loadInBackground(loadJsonDocument, self._jsonLoaded)
+
+    def _jsonLoaded(self, result):
+        self._text, model = result
+        model.setParent(self)
+        self.setModel(model)
         file_name = QDir.toNativeSeparators(self._file.fileName())
-        type = "open"
-        self._file.open(QIODevice.OpenModeFlag.ReadOnly)
-        self._text = self._file.readAll().data().decode("utf-8")
-        self._file.close()
+        self.statusMessage(f"Json document {file_name} opened", "open")
+        self.maybeEnablePrinting()
+        self.setupModelUi()
 
-        data = None
-        message = None
+    def openLazyJsonFile(self):
+        """Map the file into memory and only scan what gets expanded.
+           Printing stays disabled, as it would require the whole text."""
+        file_name = QDir.toNativeSeparators(self._file.fileName())
+        type = "open"
+        buffer = None
         try:
-            data = json.loads(self._text)
-            message = f"Json document {file_name} opened"
-            model = JsonItemModel(data, self)
-            self._tree.setModel(model)
-        except ValueError as e:
-            message = f"Unable to parse Json document from {file_name}: {e}"
-        self.statusMessage(message, type)
-        self.maybeEnablePrinting()
+            with open(self._file.fileName(), "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            model = LazyJsonItemModel(buffer, self)
+        except (OSError, ValueError) as e:
+            if buffer is not None:
+                buffer.close()
+            self.statusMessage(f"Unable to parse Json document from {file_name}: {e}", type)
+            return
+        model.parseError.connect(self._lazyParseError)
+        self._text = ""
+        self.setModel(model, buffer)
+        self.statusMessage(f"Json document {file_name} opened in lazy mode", type)
+        self.setupModelUi()
+
+    @Slot(str)
+    def _lazyParseError(self, message):
+        file_name = QDir.toNativeSeparators(self._file.fileName())
+        self.statusMessage(f"Unable to parse Json document from {file_name}: {message}",
+                           "open")
+
+    def startIndexing(self):
+        """Build the search index in the background"""
+        self.cancelIndexing()
+        self._index = JsonSearchIndex()
+        model = self._tree.model()
+        if isinstance(model, LazyJsonItemModel):
+            walk = partial(walkBuffer, self._map, model.rootItem().start(),
+                           limit=LAZY_INDEX_LIMIT)
+        else:
+            walk = partial(walkTree, model.rootItem())
+        self._indexer = JsonIndexer(walk, self)
+        self._indexer.batchReady.connect(self._indexBatchReady)
+        self._indexer.progress.connect(self._indexProgress)
+        self._indexer.finished.connect(self._indexFinished)
+        self._indexer.failed.connect(self._lazyParseError)
+        self._indexer.start()
+
+    def cancelIndexing(self):
+        if self._indexer:
+            self._indexer.cancel()
+            self._indexer = None
+
+    def _isCurrentIndexer(self):
+        return self._indexer is not None and self.sender() is self._indexer
+
+    @Slot(object)
+    def _indexBatchReady(self, batch):
+        if not self._isCurrentIndexer():
+            return
+        self._index.addBatch(batch)
+        # Refresh visible results while the index grows
+        if self._searchKey.text() and not self._searchTimer.isActive():
+            self._searchTimer.start()
+
+    @Slot(int)
+    def _indexProgress(self, percent):
+        if self._isCurrentIndexer():
+            self.statusMessage(f"{percent}% indexed", "search", 0)
+
+    @Slot()
+    def _indexFinished(self):
+        if self._isCurrentIndexer():
+            self._indexer = None
+            if (isinstance(self._tree.model(), LazyJsonItemModel)
+                    and len(self._index) == LAZY_INDEX_LIMIT):
+                self.statusMessage(f"Searching the first {LAZY_INDEX_LIMIT} items only",
+                                   "search")
+            else:
+                self.statusMessage(f"{len(self._index)} items indexed", "search")
+
+    @Slot()
+    def search(self):
+        """Show all nodes matching the search text in the Search tab"""
+        if not self._searchResults:
+            return
+        self._searchResults.clear()
+        text = self._searchKey.text()
+        if not text or self._tree.model() is None:
+            return
+        if self._index is None:
+            self.startIndexing()
+        matches = self._index.search(text, MAX_SEARCH_RESULTS)
+        for rows, label in matches:
+            item = QListWidgetItem(label, self._searchResults)
+            item.setData(Qt.ItemDataRole.UserRole, rows)
+        count = len(matches)
+        more = "+" if count == MAX_SEARCH_RESULTS else ""
+        pending = ", indexing..." if self._indexer else ""
+        self.statusMessage(f"{count}{more} matches for \"{text}\"{pending}", "search")
+        if matches:
+            self._uiAssets_tabs.setCurrentWidget(self._searchResults)
+
+    @Slot()
+    def nextSearchResult(self):
+        if not self._searchResults:
+            return
+        if self._searchTimer.isActive() or not self._searchResults.count():
+            self._searchTimer.stop()
+            self.search()
+        count = self._searchResults.count()
+        if not count:
+            return
+        row = (self._searchResults.currentRow() + 1) % count
+        self._searchResults.setCurrentRow(row)
+        self.onSearchResultClicked(self._searchResults.item(row))
 
-        return self._tree.model() is not None
+    @Slot(QListWidgetItem)
+    def onSearchResultClicked(self, item):
+        index = self.indexForPath(item.data(Qt.ItemDataRole.UserRole))
+        if not index.isValid():
+            return
+        parent = index.parent()
+        while parent.isValid():
+            self._tree.expand(parent)
+            parent = parent.parent()
+        self._tree.setCurrentIndex(index)
+        self._tree.scrollTo(index)
+
+    def indexForPath(self, rows):
+        """Resolve a path of rows to a model index, fetching lazily loaded
+           children on the way"""
+        model = self._tree.model()
+        index = QModelIndex()
+        for row in rows:
+            while model.rowCount(index) <= row and model.canFetchMore(index):
+                model.fetchMore(index)
+            child = model.index(row, 0, index)
+            if child is None or not child.isValid():
+                return QModelIndex()
+            index = child
+        return index
+
+    def cleanup(self):
+        self.cancelIndexing()
+        self._closeMap()
+        super().cleanup()
 
     def indexOf(self, item):
         return QModelIndex(item.data(Qt.ItemDataRole.UserRole))
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from PySide6.QtWidgets import (QDialog, QFileDialog, QMainWindow, QMessageBox)
-from PySide6.QtCore import (QDir, QFile, QFileInfo, QSettings, Slot)
+from PySide6.QtCore import (QDir, QFile, QFileInfo, QObject, QSettings, Slot)
 
 from ui_mainwindow import Ui_MainWindow
 from viewerfactory import ViewerFactory
@@ -34,6 +34,7 @@ class MainWindow(QMainWindow):
 
         self._currentDir = QDir()
         self._viewer = None
+        self._viewerConnections = []
         self._recentFiles = RecentFiles()
 
         self.ui.setupUi(self)
@@ -56,6 +57,9 @@ class MainWindow(QMainWindow):
         if button:
             self.ui.actionRecent.triggered.connect(button.showMenu)
 
+    def viewer(self):
+        return self._viewer
+
     @Slot(int)
     def _recentFilesCountChanged(self, count):
         self.ui.actionRecent.setText(f"{count} recent files")
@@ -83,18 +87,27 @@ class MainWindow(QMainWindow):
         self._currentDir = fileInfo.dir()
         self._recentFiles.addFile(fileInfo.absoluteFilePath())
 
-        # If a viewer is already open, clean it up and save its settings
-        self.resetViewer()
-        self._viewer = self._factory.viewer(file)
-        if not self._viewer:
+        viewer = self._factory.viewerForFile(file)
+        if not viewer:
             nf = QDir.toNativeSeparators(fileName)
             self.statusBar().showMessage(f"File {nf} can't be opened.")
             return False
 
+        # Show files of the same kind in the widgets of the open viewer
+        if viewer is self._viewer and viewer.canReopen(file):
+            viewer.reopen(file)
+            return True
+
+        # If a viewer is already open, clean it up and save its settings
+        self.resetViewer()
+        self._viewer = viewer
+        self._viewer.init(file, self.ui.viewArea, self)
+
         self.ui.actionPrint.setEnabled(self._viewer.hasContent())
-        self._viewer.printingEnabledChanged.connect(self.ui.actionPrint.setEnabled)
-        self.ui.actionPrint.triggered.connect(self._viewer.print_)
-        self._viewer.showMessage.connect(self.statusBar().showMessage)
+        self._viewerConnections = [
+            self._viewer.printingEnabledChanged.connect(self.ui.actionPrint.setEnabled),
+            self.ui.actionPrint.triggered.connect(self._viewer.print_),
+            self._viewer.showMessage.connect(self.statusBar().showMessage)]
 
         self._viewer.initViewer(self.ui.actionBack, self.ui.actionForward,
                                 self.ui.menuHelp.menuAction(),
@@ -166,6 +179,9 @@ class MainWindow(QMainWindow):
         if not self._viewer:
             return
         self.saveViewerSettings()
+        for connection in self._viewerConnections:
+            QObject.disconnect(connection)
+        self._viewerConnections.clear()
         self._viewer.cleanup()
 
     def restoreViewerSettings(self):
@@ -0,0 +1,230 @@
+# Copyright (C) 2023 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Renders Pdf pages on a thread pool for the overview and for printing.
+
+Requests are served by priority, visible pages before their neighbours,
+and rendered pages are kept in an LRU cache keyed by (page, zoom, dpi)."""
+
+import heapq
+import threading
+from collections import OrderedDict, deque
+
+from PySide6.QtGui import QGuiApplication, QImage, QPixmap
+from PySide6.QtCore import (QIdentityProxyModel, QObject, QSize, QThreadPool, Qt,
+                            Signal, Slot)
+
+
+RENDER_THREADS = 2
+PAGE_CACHE_SIZE = 128 * 1024 * 1024  # bytes
+MAX_QUEUED = 64  # requests
+NEIGHBOUR_PAGES = 2
+THUMBNAIL_SIZE = 96  # pixels
+PRINT_LOOKAHEAD = 2  # pages
+
+VISIBLE = 0
+NEIGHBOUR = 1
+
+
+def renderSize(document, page, zoom, dpi):
+    """Return the size in pixels of a page at zoom and dpi"""
+    points = document.pagePointSize(page)
+    factor = zoom * dpi / 72
+    return QSize(max(1, round(points.width() * factor)),
+                 max(1, round(points.height() * factor)))
+
+
+def fitZoom(document, page, size, dpi):
+    """Return the zoom making a page fit into size at dpi"""
+    points = document.pagePointSize(page)
+    if points.isEmpty():
+        return 1.0
+    factor = dpi / 72
+    return min(size.width() / (points.width() * factor),
+               size.height() / (points.height() * factor))
+
+
+class PageCache:
+    """An LRU cache of pixmaps bounded by their size in bytes. Pixmaps
+       which would evict most of the cache are not stored."""
+
+    def __init__(self, budget=PAGE_CACHE_SIZE):
+        self._budget = budget
+        self._cost = 0
+        self._pages = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._pages
+
+    def get(self, key):
+        pixmap = self._pages.get(key)
+        if pixmap is not None:
+            self._pages.move_to_end(key)
+        return pixmap
+
+    def insert(self, key, pixmap):
+        cost = pixmap.width() * pixmap.height() * 4
+        if cost > self._budget // 4 or key in self._pages:
+            return
+        self._cost += cost
+        self._pages[key] = pixmap
+        while self._cost > self._budget:
+            _, evicted = self._pages.popitem(last=False)
+            self._cost -= evicted.width() * evicted.height() * 4
+
+    def clear(self):
+        self._pages.clear()
+        self._cost = 0
+
+
+class PrintJob:
+    """Renders one page for printing, waited for by the printing thread"""
+
+    def __init__(self, document, page, size):
+        self._document = document
+        self._page = page
+        self._size = size
+        self._image = QImage()
+        self._done = threading.Event()
+
+    def run(self):
+        self._image = self._document.render(self._page, self._size)
+        self._done.set()
+
+    def result(self):
+        self._done.wait()
+        return self._image
+
+
+class PageRenderService(QObject):
+    """Renders pages of a QPdfDocument on a thread pool. The Pdf library
+       serializes rendering, so a few threads suffice to keep the GUI
+       thread free; the order is decided by a priority queue."""
+
+    pageRendered = Signal(int)
+    _rendered = Signal(int, object, QImage)
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(RENDER_THREADS)
+        self._cache = PageCache()
+        # Heap of (priority, -sequence, key), newer requests first
+        self._queue = []
+        self._sequence = 0
+        self._running = set()
+        self._generation = 0
+        self._rendered.connect(self._onRendered)
+
+    def clear(self):
+        """Forget all pages, for example when another document is loaded"""
+        self._generation += 1
+        self._queue.clear()
+        self._running.clear()
+        self._cache.clear()
+
+    def pixmap(self, page, zoom, dpi):
+        return self._cache.get((page, zoom, dpi))
+
+    def request(self, page, zoom, dpi):
+        """Render page, then its neighbours, unless they are cached"""
+        self._enqueue((page, zoom, dpi), VISIBLE)
+        for distance in range(1, NEIGHBOUR_PAGES + 1):
+            for neighbour in (page + distance, page - distance):
+                if 0 <= neighbour < self._document.pageCount():
+                    self._enqueue((neighbour, zoom, dpi), NEIGHBOUR)
+        self._startNext()
+
+    def _enqueue(self, key, priority):
+        if key in self._running or key in self._cache:
+            return
+        self._sequence += 1
+        heapq.heappush(self._queue, (priority, -self._sequence, key))
+        if len(self._queue) > MAX_QUEUED:
+            # A sorted list is a heap
+            self._queue = heapq.nsmallest(MAX_QUEUED, self._queue)
+
+    def _startNext(self):
+        while self._queue and len(self._running) < RENDER_THREADS:
+            _, _, key = heapq.heappop(self._queue)
+            if key in self._running or key in self._cache:
+                continue
+            self._running.add(key)
+            size = renderSize(self._document, *key)
+            self._pool.start(lambda key=key, size=size, generation=self._generation:
+                             self._rendered.emit(generation, key,
+                                                 self._document.render(key[0], size)))
+
+    @Slot(int, object, QImage)
+    def _onRendered(self, generation, key, image):
+        if generation != self._generation:
+            return
+        self._running.discard(key)
+        if not image.isNull():
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(key[2] / 72)
+            self._cache.insert(key, pixmap)
+            self.pageRendered.emit(key[0])
+        self._startNext()
+
+    def printPages(self, size, dpi):
+        """Yield the images of all pages fitted into size at dpi, in order.
+
+        Up to PRINT_LOOKAHEAD pages are rendered ahead on the pool while
+        the current one is printed; these jobs are the only cache of the
+        print run, so only a few pages are held at any time. The pixmap
+        cache of the view is neither used nor filled, print resolutions
+        would not match its keys and would evict the visible pages."""
+        count = self._document.pageCount()
+        jobs = deque()
+        next = 0
+        for page in range(count):
+            while next < count and len(jobs) <= PRINT_LOOKAHEAD:
+                jobs.append(self._printJob(next, size, dpi))
+                next += 1
+            yield jobs.popleft().result()
+
+    def _printJob(self, page, size, dpi):
+        zoom = fitZoom(self._document, page, size, dpi)
+        job = PrintJob(self._document, page, renderSize(self._document, page, zoom, dpi))
+        self._pool.start(job.run, 1)
+        return job
+
+
+class PageThumbnailModel(QIdentityProxyModel):
+    """Adds thumbnails rendered by a PageRenderService to the page model of
+       a document. Only pages shown by a view are requested."""
+
+    def __init__(self, service, document, parent=None):
+        super().__init__(parent)
+        self._service = service
+        self._service.pageRendered.connect(self._pageRendered)
+        self._document = document
+        self.setSourceModel(document.pageModel())
+        self._dpi = 72 * QGuiApplication.instance().devicePixelRatio()
+        self._placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self._placeholder.fill(Qt.GlobalColor.transparent)
+
+    def thumbnailZoom(self, page):
+        points = self._document.pagePointSize(page)
+        longest = max(points.width(), points.height())
+        return THUMBNAIL_SIZE / longest if longest > 0 else 1.0
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DecorationRole or not index.isValid():
+            return super().data(index, role)
+        page = index.row()
+        zoom = self.thumbnailZoom(page)
+        pixmap = self._service.pixmap(page, zoom, self._dpi)
+        if pixmap is None:
+            self._service.request(page, zoom, self._dpi)
+            return self._placeholder
+        return pixmap
+
+    @Slot(int)
+    def _pageRendered(self, page):
+        if page < self.rowCount():
+            index = self.index(page, 0)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
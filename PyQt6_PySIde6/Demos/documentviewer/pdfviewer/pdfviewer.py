@@ -7,13 +7,15 @@ from math import sqrt
 from PySide6.QtWidgets import (QListView, QTreeView)
 from PySide6.QtGui import QIcon, QKeySequence, QPainter
 from PySide6.QtCore import (QDir, QIODevice, QModelIndex,
-                            QPointF, Slot)
+                            QPointF, QRect, QSize, Slot)
 from PySide6.QtPrintSupport import QPrinter
 from PySide6.QtPdf import QPdfDocument, QPdfBookmarkModel
 from PySide6.QtPdfWidgets import QPdfView, QPdfPageSelector
 
 from abstractviewer import AbstractViewer
 from pdfviewer.zoomselector import ZoomSelector
+from pdfviewer.pagerenderer import (THUMBNAIL_SIZE, PageRenderService,
+                                    PageThumbnailModel)
 
 
 ZOOM_MULTIPLIER = sqrt(2.0)
@@ -33,11 +35,14 @@ class PdfViewer(AbstractViewer):
         self._actionBack = None
         self._bookmarks = None
         self._pages = None
+        self._renderService = None
 
     def init(self, file, parent, mainWindow):
         self._pdfView = QPdfView(parent)
+        self._pages = None
         super().init(file, self._pdfView, mainWindow)
         self._document = QPdfDocument(self)
+        self._renderService = PageRenderService(self._document, self)
 
     def supportedMimeTypes(self):
         return ["application/pdf"]
@@ -55,8 +60,7 @@ class PdfViewer(AbstractViewer):
         nav.backAvailableChanged.connect(self._uiAssets_back.setEnabled)
         self._actionBack = self._uiAssets_back
         self._actionForward = self._uiAssets_forward
-        self._uiAssets_back.triggered.connect(self.onActionBackTriggered)
-        self._uiAssets_forward.triggered.connect(self.onActionForwardTriggered)
+        self.connectNavigation(self.onActionBackTriggered, self.onActionForwardTriggered)
 
         self._toolBar.addSeparator()
         self._toolBar.addWidget(self._zoomSelector)
@@ -94,7 +98,10 @@ class PdfViewer(AbstractViewer):
             return
 
         self._pages = QListView(self._uiAssets_tabs)
-        self._pages.setModel(self._document.pageModel())
+        self._pages.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self._pages.setUniformItemSizes(True)
+        self._pages.setModel(PageThumbnailModel(self._renderService, self._document,
+                                                self._pages))
 
         self._pages.selectionModel().currentRowChanged.connect(self._currentRowChanged)
         self._pdfView.pageNavigator().currentPageChanged.connect(self._pageChanged)
@@ -105,6 +112,18 @@ class PdfViewer(AbstractViewer):
     def viewerName(self):
         return "PdfViewer"
 
+    def canReopen(self, file):
+        # The overview is only set up for documents with pages
+        return self._pages is not None
+
+    def reopen(self, file):
+        self._document.close()
+        self._file.close()
+        super().reopen(file)
+
+    def openDocument(self):
+        self.openPdfFile()
+
     @Slot(QModelIndex, QModelIndex)
     def _currentRowChanged(self, current, previous):
         if previous == current:
@@ -125,6 +144,7 @@ class PdfViewer(AbstractViewer):
     @Slot()
     def openPdfFile(self):
         self.disablePrinting()
+        self._renderService.clear()
 
         if self._file.open(QIODevice.OpenModeFlag.ReadOnly):
             self._document.load(self._file)
@@ -149,15 +169,15 @@ class PdfViewer(AbstractViewer):
         if not self.hasContent():
             return
 
+        # Pages are rendered ahead on a thread pool and printed one by one
         painter = QPainter()
         painter.begin(printer)
         pageRect = printer.pageRect(QPrinter.Unit.DevicePixel).toRect()
-        pageSize = pageRect.size()
-        for i in range(0, self._document.pageCount()):
+        pages = self._renderService.printPages(pageRect.size(), printer.resolution())
+        for i, page in enumerate(pages):
             if i > 0:
                 printer.newPage()
-            page = self._document.render(i, pageSize)
-            painter.drawImage(pageRect, page)
+            painter.drawImage(QRect(pageRect.topLeft(), page.size()), page)
         painter.end()
 
     @Slot(QModelIndex)
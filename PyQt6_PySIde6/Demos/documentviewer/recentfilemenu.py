@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from PySide6.QtWidgets import QMenu
+from PySide6.QtGui import QAction
 from PySide6.QtCore import Signal, Slot
 
 
@@ -12,22 +13,54 @@ class RecentFileMenu(QMenu):
     def __init__(self, parent, recent):
         super().__init__(parent)
         self._recentFiles = recent
+        # File name -> action, the most recent file last
+        self._actions = {}
         self._recentFiles.changed.connect(self.updateList)
+        self._recentFiles.fileAdded.connect(self._fileAdded)
+        self._recentFiles.fileRemoved.connect(self._fileRemoved)
         self._recentFiles.destroyed.connect(self.deleteLater)
+        self.aboutToShow.connect(self._recentFiles.validate)
         self.updateList()
 
     @Slot()
     def updateList(self):
-        for a in self.actions():
-            del a
+        self.clear()
+        self._actions.clear()
 
-        if not self._recentFiles:
+        if self._recentFiles.isEmpty():
             self.addAction("<no recent files>")
             return
 
-        for fileName in self._recentFiles.recentFiles():
-            action = self.addAction(fileName)
-            action.triggered.connect(self._emitFileOpened)
+        for fileName in reversed(self._recentFiles.recentFiles()):
+            self._fileAdded(fileName)
+
+    def _createAction(self, fileName):
+        action = QAction(fileName, self)
+        action.triggered.connect(self._emitFileOpened)
+        return action
+
+    @Slot(str)
+    def _fileAdded(self, fileName):
+        if not self._actions:
+            self.clear()  # remove the placeholder
+        action = self._actions.pop(fileName, None)
+        if action is None:
+            action = self._createAction(fileName)
+        else:
+            self.removeAction(action)
+        first = next(reversed(self._actions.values()), None)
+        self.insertAction(first, action)
+        self._actions[fileName] = action
+
+    @Slot(str)
+    def _fileRemoved(self, fileName):
+        action = self._actions.pop(fileName, None)
+        if action is None:
+            return
+        self.removeAction(action)
+        action.deleteLater()
+        if not self._actions:
+            self.addAction("<no recent files>")
 
     @Slot()
     def _emitFileOpened(self):
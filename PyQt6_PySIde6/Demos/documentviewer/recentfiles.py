@@ -2,12 +2,17 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
+from collections import OrderedDict
 from enum import Enum, auto
 
-from PySide6.QtCore import QFileInfo, QObject, QSettings, Signal, Slot
+from PySide6.QtCore import (QFileInfo, QObject, QSettings, QThreadPool, QTimer,
+                            Signal, Slot)
 
 
 DEFAULT_MAX_FILES = 10
+MAX_FILES_LIMIT = 10000
+VALIDATION_THREADS = 8
+VALIDATION_TIMEOUT = 3000  # ms
 
 
 # Test if file exists and can be opened
@@ -15,6 +20,60 @@ def testFileAccess(fileName):
     return QFileInfo(fileName).isReadable()
 
 
+class FileValidator(QObject):
+    """Tests file access on a thread pool, so that slow (network) files do
+       not block the GUI. Checks not done within VALIDATION_TIMEOUT are
+       abandoned and their files are kept."""
+
+    invalid = Signal(str)
+    finished = Signal()
+    _checked = Signal(int, str, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(VALIDATION_THREADS)
+        self._generation = 0
+        self._pending = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(VALIDATION_TIMEOUT)
+        self._timer.timeout.connect(self._timedOut)
+        self._checked.connect(self._onChecked)
+
+    def isRunning(self):
+        return bool(self._pending)
+
+    def validate(self, fileNames):
+        generation = self._generation
+        for fileName in fileNames:
+            if fileName in self._pending:
+                continue
+            self._pending.add(fileName)
+            self._pool.start(lambda f=fileName: self._checked.emit(generation, f,
+                                                                   testFileAccess(f)))
+        if self._pending:
+            self._timer.start()
+
+    @Slot(int, str, bool)
+    def _onChecked(self, generation, fileName, ok):
+        if generation != self._generation:
+            return
+        self._pending.discard(fileName)
+        if not ok:
+            self.invalid.emit(fileName)
+        if not self._pending:
+            self._timer.stop()
+            self.finished.emit()
+
+    @Slot()
+    def _timedOut(self):
+        # Late results belong to an old generation and are ignored
+        self._generation += 1
+        self._pending.clear()
+        self.finished.emit()
+
+
 class RemoveReason(Enum):
     Other = auto()
     Duplicate = auto()
@@ -32,78 +91,98 @@ s_file = "file"
 
 
 class RecentFiles(QObject):
+    """The list of recently opened files, most recent first.
+
+    fileAdded and fileRemoved report single changes, changed reports that
+    the whole list needs to be reread. Files which are no longer accessible
+    are removed in the background."""
 
     countChanged = Signal(int)
     changed = Signal()
+    fileAdded = Signal(str)
+    fileRemoved = Signal(str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._maxFiles = DEFAULT_MAX_FILES
-        self._files = []
+        # The files as keys, most recent last
+        self._files = OrderedDict()
+        self._validator = FileValidator(self)
+        self._validator.invalid.connect(self._removeInvalidFile)
 
     # Access to QStringList member functions
     def recentFiles(self):
-        return self._files
+        return list(reversed(self._files))
 
     def isEmpty(self):
         return not self._files
 
+    def count(self):
+        return len(self._files)
+
     # Properties
     def maxFiles(self):
         return self._maxFiles
 
     def setMaxFiles(self, maxFiles):
-        self._maxFiles = maxFiles
+        self._maxFiles = max(1, min(maxFiles, MAX_FILES_LIMIT))
+        c = len(self._files)
+        self._cutTail(EmitPolicy.EmitWhenChanged)
+        if c != len(self._files):
+            self.countChanged.emit(len(self._files))
 
     def addFile(self, fileName):
         self._addFile(fileName, EmitPolicy.EmitWhenChanged)
 
     def removeFile(self, fileName):
-        idx = self._files.find(fileName)
-        self._removeFile(idx, RemoveReason.Other)
+        c = len(self._files)
+        self._removeFile(fileName, RemoveReason.Other)
+        if c != len(self._files):
+            self.countChanged.emit(len(self._files))
+
+    @Slot()
+    def validate(self):
+        """Remove files which are no longer accessible, in the background"""
+        self._validator.validate(list(self._files))
 
     @Slot()
     def clear(self):
         if self.isEmpty():
             return
         self._files.clear()
+        self.changed.emit()
         self.countChanged.emit(0)
 
     def _addFile(self, fileName, policy):
-        if not testFileAccess(fileName):
-            return
-
-        # Remember size, as cleanup can result in a change without size change
+        # Remember size, as moving a duplicate to the top keeps the size
         c = len(self._files)
 
-        # Clean dangling and duplicate files
-        i = 0
-        while i < len(self._files):
-            file = self._files[i]
-            if not testFileAccess(file):
-                self._removeFile(file, RemoveReason.Other)
-            elif file == fileName:
-                self._removeFile(file, RemoveReason.Duplicate)
-            else:
-                i += 1
-
-        # Cut tail
-        while len(self._files) > self._maxFiles:
-            self.removeFile((len(self._files) - 1), RemoveReason.Other)
+        if fileName in self._files:
+            self._files.move_to_end(fileName)
+        else:
+            self._files[fileName] = None
+        self._cutTail(policy)
 
-        self._files.insert(0, fileName)
+        # Access is tested in the background, see _removeInvalidFile()
+        self._validator.validate([fileName])
 
         if policy == EmitPolicy.NeverEmit:
             return
 
         if policy == EmitPolicy.EmitWhenChanged:
-            self.changed.emit()
+            self.fileAdded.emit(fileName)
             if c != len(self._files):
                 self.countChanged.emit(len(self._files))
 
+    def _cutTail(self, policy):
+        while len(self._files) > self._maxFiles:
+            fileName, _ = self._files.popitem(last=False)
+            if policy == EmitPolicy.EmitWhenChanged:
+                self.fileRemoved.emit(fileName)
+
     @Slot(list)
     def addFiles(self, files):
-        if files.isEmpty():
+        if not files:
             return
 
         if len(files) == 1:
@@ -113,23 +192,24 @@ class RecentFiles(QObject):
         c = len(self._files)
 
         for file in files:
-            self.addFile(file, EmitPolicy.NeverEmit)
+            self._addFile(file, EmitPolicy.NeverEmit)
 
         self.changed.emit()
         if len(self._files) != c:
             self.countChanged.emit(len(self._files))
 
-    def _removeFile(self, p, reason):
-        index = p
-        if isinstance(p, str):
-            index = self._files.index(p) if p in self._files else -1
-        if index < 0 or index >= len(self._files):
+    def _removeFile(self, fileName, reason):
+        if fileName not in self._files:
             return
-        del self._files[index]
+        del self._files[fileName]
 
         # No emit for duplicate removal, add emits changed later.
         if reason != RemoveReason.Duplicate:
-            self.changed.emit()
+            self.fileRemoved.emit(fileName)
+
+    @Slot(str)
+    def _removeInvalidFile(self, fileName):
+        self.removeFile(fileName)
 
     @Slot(QSettings, str)
     def saveSettings(self, settings, key):
@@ -137,7 +217,7 @@ class RecentFiles(QObject):
         settings.setValue(s_maxFiles, self.maxFiles())
         if self._files:
             settings.beginWriteArray(s_fileNames, len(self._files))
-            for index, file in enumerate(self._files):
+            for index, file in enumerate(self.recentFiles()):
                 settings.setArrayIndex(index)
                 settings.setValue(s_file, file)
             settings.endArray()
@@ -149,12 +229,17 @@ class RecentFiles(QObject):
         self.setMaxFiles(settings.value(s_maxFiles, DEFAULT_MAX_FILES, int))
         self._files.clear()  # clear list without emitting
         numberFiles = settings.beginReadArray(s_fileNames)
-        for index in range(0, numberFiles):
+        files = []
+        for index in range(0, min(numberFiles, self._maxFiles)):
             settings.setArrayIndex(index)
-            absoluteFilePath = settings.value(s_file)
-            self._addFile(absoluteFilePath, EmitPolicy.NeverEmit)
+            files.append(settings.value(s_file))
         settings.endArray()
         settings.endGroup()
+        # The most recent file was saved first
+        for file in reversed(files):
+            self._files[file] = None
+        self.validate()
         if self._files:
             self.changed.emit()
+            self.countChanged.emit(len(self._files))
         return True
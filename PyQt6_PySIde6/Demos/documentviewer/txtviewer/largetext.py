@@ -0,0 +1,218 @@
+# Copyright (C) 2023 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Support for viewing text files too large for QPlainTextEdit.
+
+The file is memory mapped and indexed by line start offsets in one pass.
+LineView then decodes and paints only the lines that are visible."""
+
+import mmap
+from array import array
+from itertools import accumulate, repeat
+from operator import add
+
+from PySide6.QtWidgets import QAbstractScrollArea
+from PySide6.QtGui import QFontDatabase, QPainter, QPalette
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, Signal
+
+
+INDEX_CHUNK_SIZE = 16 * 1024 * 1024  # bytes
+MARGIN = 4  # pixels
+
+
+def buildLineIndex(buffer, loader=None):
+    """Return the offsets of all line starts in buffer, followed by its size.
+
+    The buffer is split in chunks ending at a line break; splitting and
+    summing up the line lengths is done by builtins, avoiding a Python
+    level loop over the lines."""
+    size = len(buffer)
+    offsets = array("q")
+    pos = 0
+    while pos < size:
+        end = min(pos + INDEX_CHUNK_SIZE, size)
+        if end < size:
+            newline = buffer.rfind(b"\n", pos, end)
+            if newline < 0:
+                newline = buffer.find(b"\n", end)
+            end = newline + 1 if newline >= 0 else size
+        pieces = buffer[pos:end].split(b"\n")
+        count = len(pieces) - 1 if not pieces[-1] else len(pieces)
+        lengths = map(add, map(len, pieces[:count - 1]), repeat(1))
+        offsets.extend(accumulate(lengths, initial=pos))
+        pos = end
+        if loader:
+            loader.setProgress(pos, size)
+    offsets.append(size)
+    return offsets
+
+
+def loadLineIndex(loader):
+    """Map the file and index its lines in a worker thread"""
+    with open(loader.fileName(), "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return buffer, buildLineIndex(buffer, loader)
+
+
+class LineIndexModel(QAbstractListModel):
+    """A read-only model of the lines of a memory mapped text file"""
+
+    def __init__(self, buffer, offsets, parent=None):
+        super().__init__(parent)
+        self._buffer = buffer
+        self._offsets = offsets
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._offsets) - 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self.line(index.row())
+
+    def line(self, row):
+        start = self._offsets[row]
+        end = self._offsets[row + 1]
+        text = self._buffer[start:end].rstrip(b"\r\n")
+        return text.decode("utf-8", errors="replace")
+
+
+class LineView(QAbstractScrollArea):
+    """Paints the visible lines of a LineIndexModel.
+
+    The vertical scroll bar counts lines, so jumping to any line and
+    painting take constant time regardless of the number of lines."""
+
+    currentLineChanged = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._model = None
+        self._current = 0
+        self._anchor = 0
+        self._textWidth = 0
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def model(self):
+        return self._model
+
+    def setModel(self, model):
+        self._model = model
+        self._current = self._anchor = 0
+        self._textWidth = 0
+        self._updateScrollBars()
+        self.viewport().update()
+
+    def lineCount(self):
+        return self._model.rowCount() if self._model else 0
+
+    def lineHeight(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visibleLineCount(self):
+        return max(1, self.viewport().height() // self.lineHeight())
+
+    def firstVisibleLine(self):
+        return self.verticalScrollBar().value()
+
+    def currentLine(self):
+        return self._current
+
+    def selectedLines(self):
+        return range(min(self._anchor, self._current), max(self._anchor, self._current) + 1)
+
+    def goToLine(self, row, extendSelection=False):
+        """Make the (0 based) row current and scroll it into view"""
+        if not self.lineCount():
+            return
+        row = max(0, min(row, self.lineCount() - 1))
+        self._current = row
+        if not extendSelection:
+            self._anchor = row
+        bar = self.verticalScrollBar()
+        if row < bar.value():
+            bar.setValue(row)
+        elif row >= bar.value() + self.visibleLineCount():
+            bar.setValue(row - self.visibleLineCount() + 1)
+        self.viewport().update()
+        self.currentLineChanged.emit(row)
+
+    def scrollToLine(self, row):
+        """Make the (0 based) row current and show it at the top"""
+        self.verticalScrollBar().setValue(row)
+        self.goToLine(row)
+
+    def _updateScrollBars(self):
+        visible = self.visibleLineCount()
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.lineCount() - visible))
+        bar.setPageStep(visible)
+        bar = self.horizontalScrollBar()
+        bar.setRange(0, max(0, self._textWidth + 2 * MARGIN - self.viewport().width()))
+        bar.setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._updateScrollBars()
+
+    def paintEvent(self, event):
+        if not self._model:
+            return
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        height = self.lineHeight()
+        width = self.viewport().width()
+        x = MARGIN - self.horizontalScrollBar().value()
+        first = self.firstVisibleLine()
+        last = min(first + self.visibleLineCount() + 1, self.lineCount())
+        selected = self.selectedLines()
+        palette = self.palette()
+        textWidth = self._textWidth
+        for row in range(first, last):
+            y = (row - first) * height
+            text = self._model.line(row)
+            if row in selected:
+                painter.fillRect(0, y, width, height, palette.color(QPalette.ColorRole.Highlight))
+                painter.setPen(palette.color(QPalette.ColorRole.HighlightedText))
+            else:
+                painter.setPen(palette.color(QPalette.ColorRole.Text))
+            painter.drawText(x, y + metrics.ascent(), text)
+            textWidth = max(textWidth, metrics.horizontalAdvance(text))
+        if textWidth != self._textWidth:
+            self._textWidth = textWidth
+            self._updateScrollBars()
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.MouseButton.LeftButton:
+            return super().mousePressEvent(event)
+        row = self.firstVisibleLine() + int(event.position().y()) // self.lineHeight()
+        if row < self.lineCount():
+            extend = bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+            self.goToLine(row, extend)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            row = self.firstVisibleLine() + int(event.position().y()) // self.lineHeight()
+            self.goToLine(row, True)
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        extend = bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+        if key == Qt.Key.Key_Up:
+            self.goToLine(self._current - 1, extend)
+        elif key == Qt.Key.Key_Down:
+            self.goToLine(self._current + 1, extend)
+        elif key == Qt.Key.Key_PageUp:
+            self.goToLine(self._current - self.visibleLineCount(), extend)
+        elif key == Qt.Key.Key_PageDown:
+            self.goToLine(self._current + self.visibleLineCount(), extend)
+        elif key == Qt.Key.Key_Home and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.goToLine(0, extend)
+        elif key == Qt.Key.Key_End and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.goToLine(self.lineCount() - 1, extend)
+        else:
+            super().keyPressEvent(event)
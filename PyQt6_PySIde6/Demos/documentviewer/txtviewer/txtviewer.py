@@ -2,12 +2,27 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
-from PySide6.QtWidgets import (QDialog, QFileDialog,
-                               QPlainTextEdit)
-from PySide6.QtGui import QAction, QGuiApplication, QIcon, QKeySequence
+from PySide6.QtWidgets import (QDialog, QFileDialog, QInputDialog,
+                               QPlainTextDocumentLayout, QPlainTextEdit)
+from PySide6.QtGui import (QAction, QGuiApplication, QIcon, QKeySequence,
+                           QTextCursor, QTextDocument)
 from PySide6.QtCore import QDir, QFile, QTextStream, Qt, Slot
 
 from abstractviewer import AbstractViewer
+from txtviewer.largetext import LineIndexModel, LineView, loadLineIndex
+
+
+# Files larger than this are memory mapped and shown line by line
+LARGE_FILE_THRESHOLD = 64 * 1024 * 1024  # bytes
+
+# Text is inserted into the document in chunks between events, so that the
+# GUI keeps repainting while it is laid out.
+INSERT_CHUNK_SIZE = 64 * 1024  # characters
+
+
+def loadTextDocument(loader):
+    """Read and decode the text in a worker thread"""
+    return loader.readAll().decode("utf-8", errors="replace")
 
 
 class TxtViewer(AbstractViewer):
@@ -16,17 +31,34 @@ class TxtViewer(AbstractViewer):
         self.uiInitialized.connect(self.setupTxtUi)
 
     def init(self, file, parent, mainWindow):
-        self._textEdit = QPlainTextEdit(parent)
-        super().init(file, self._textEdit, mainWindow)
+        self._largeFile = file.size() > LARGE_FILE_THRESHOLD
+        self._lineModel = None
+        if self._largeFile:
+            self._textEdit = None
+            self._lineView = LineView(parent)
+            super().init(file, self._lineView, mainWindow)
+        else:
+            self._textEdit = QPlainTextEdit(parent)
+            super().init(file, self._textEdit, mainWindow)
 
     def viewerName(self):
         return "TxtViewer"
 
+    def canReopen(self, file):
+        return (file.size() > LARGE_FILE_THRESHOLD) == self._largeFile
+
+    def openDocument(self):
+        self.openFile()
+
     def supportedMimeTypes(self):
         return ["text/plain"]
 
     @Slot()
     def setupTxtUi(self):
+        if self._largeFile:
+            self.setupLargeFileUi()
+            return
+
         editMenu = self.addMenu("Edit")
         editToolBar = self.addToolBar("Edit")
         cutIcon = QIcon.fromTheme(QIcon.ThemeIcon.EditCut,
@@ -62,12 +94,59 @@ class TxtViewer(AbstractViewer):
         copyAct.setEnabled(False)
         self._textEdit.copyAvailable.connect(cutAct.setEnabled)
         self._textEdit.copyAvailable.connect(copyAct.setEnabled)
+        self._textEdit.textChanged.connect(self._textChanged)
 
         self.openFile()
 
-        self._textEdit.textChanged.connect(self._textChanged)
-        self._uiAssets_back.triggered.connect(self._back)
-        self._uiAssets_forward.triggered.connect(self._forward)
+        self.connectNavigation(self._back, self._forward)
+
+    def setupLargeFileUi(self):
+        editMenu = self.addMenu("Edit")
+        editToolBar = self.addToolBar("Edit")
+        copyIcon = QIcon.fromTheme(QIcon.ThemeIcon.EditCopy,
+                                   QIcon(":/demos/documentviewer/images/copy.png"))
+        copyAct = QAction(copyIcon, "Copy", self)
+        copyAct.setShortcuts(QKeySequence.StandardKey.Copy)
+        copyAct.setStatusTip("Copy the selected lines to the clipboard")
+        copyAct.triggered.connect(self._copyLines)
+        editMenu.addAction(copyAct)
+        editToolBar.addAction(copyAct)
+
+        goToLineAct = QAction("Go to Line...", self)
+        goToLineAct.setShortcut(QKeySequence(Qt.KeyboardModifier.ControlModifier | Qt.Key.Key_L))
+        goToLineAct.setStatusTip("Jump to a line number")
+        goToLineAct.triggered.connect(self._goToLine)
+        editMenu.addAction(goToLineAct)
+        editToolBar.addAction(goToLineAct)
+
+        self.menuBar().addSeparator()
+
+        self.openFile()
+
+        self.connectNavigation(self._back, self._forward)
+
+    @Slot()
+    def _copyLines(self):
+        if not self._lineModel:
+            return
+        rows = self._lineView.selectedLines()
+        text = "\n".join(self._lineModel.line(row) for row in rows)
+        QGuiApplication.clipboard().setText(text)
+
+    @Slot()
+    def _goToLine(self):
+        if not self._lineModel:
+            return
+        count = self._lineModel.rowCount()
+        current = self._lineView.currentLine() + 1
+        line, ok = QInputDialog.getInt(self.mainWindow(), "Go to Line",
+                                       f"Line (1 - {count}):", current, 1, count)
+        if ok:
+            self.goToLine(line)
+
+    def goToLine(self, line):
+        """Scroll to the given (1 based) line"""
+        self._lineView.scrollToLine(line - 1)
 
     @Slot()
     def _textChanged(self):
@@ -75,13 +154,13 @@ class TxtViewer(AbstractViewer):
 
     @Slot()
     def _back(self):
-        bar = self._textEdit.verticalScrollBar()
+        bar = self.widget().verticalScrollBar()
         if bar.value() > bar.minimum():
             bar.setValue(bar.value() - 1)
 
     @Slot()
     def _forward(self):
-        bar = self._textEdit.verticalScrollBar()
+        bar = self.widget().verticalScrollBar()
         if bar.value() < bar.maximum():
             bar.setValue(bar.value() + 1)
 
@@ -93,24 +172,63 @@ class TxtViewer(AbstractViewer):
             err = self._file.errorString()
             self.statusMessage(f"Cannot read file {file_name}:\n{err}.", type)
             return
+        self._file.close()
+
+        if self._largeFile:
+            self.disablePrinting()
+            self.loadInBackground(loadLineIndex, self._lineIndexLoaded)
+            return
 
-        in_str = QTextStream(self._file)
-        QGuiApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         if self._textEdit.toPlainText():
             self._textEdit.clear()
             self.disablePrinting()
 
-        self._textEdit.setPlainText(in_str.readAll())
-        QGuiApplication.restoreOverrideCursor()
+        self.loadInBackground(loadTextDocument, self._documentLoaded)
+
+    def _documentLoaded(self, text):
+        # Documents can only be laid out in the GUI thread
+        document = QTextDocument()
+        document.setUndoRedoEnabled(False)
+        document.setDocumentLayout(QPlainTextDocumentLayout(document))
+        cursor = QTextCursor(document)
+        for start in range(0, len(text), INSERT_CHUNK_SIZE):
+            cursor.insertText(text[start:start + INSERT_CHUNK_SIZE])
+            yield min(start + INSERT_CHUNK_SIZE, len(text)) * 100 // len(text)
+        document.setUndoRedoEnabled(True)
 
-        self.statusMessage(f"File {file_name} loaded.", type)
+        # The initial document is deleted by the editor, previously loaded
+        # ones are ours to delete
+        previous = self._textEdit.document()
+        loaded = previous.parent() is self._textEdit
+        document.setParent(self._textEdit)
+        self._textEdit.setDocument(document)
+        if loaded:
+            previous.deleteLater()
+
+        file_name = QDir.toNativeSeparators(self._file.fileName())
+        self.statusMessage(f"File {file_name} loaded.", "open")
         self.maybeEnablePrinting()
 
+    def _lineIndexLoaded(self, result):
+        buffer, offsets = result
+        previous = self._lineModel
+        self._lineModel = LineIndexModel(buffer, offsets, self)
+        self._lineView.setModel(self._lineModel)
+        if previous:
+            previous.deleteLater()
+
+        # Printing stays disabled, it would need to lay out the whole file
+        file_name = QDir.toNativeSeparators(self._file.fileName())
+        count = self._lineModel.rowCount()
+        self.statusMessage(f"File {file_name} loaded, {count} lines.", "open")
+
     def hasContent(self):
+        if self._largeFile:
+            return self._lineModel is not None and self._lineModel.rowCount() > 0
         return bool(self._textEdit.toPlainText())
 
     def printDocument(self, printer):
-        if not self.hasContent():
+        if not self.hasContent() or self._largeFile:
             return
 
         self._textEdit.print_(printer)
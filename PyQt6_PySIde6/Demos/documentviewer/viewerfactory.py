@@ -5,7 +5,7 @@ from __future__ import annotations
 from enum import Enum, auto
 
 from PySide6.QtWidgets import (QMessageBox)
-from PySide6.QtCore import (QFileInfo, QMimeDatabase, QTimer)
+from PySide6.QtCore import (QFileInfo, QIODevice, QMimeDatabase, QTimer)
 
 from txtviewer.txtviewer import TxtViewer
 from jsonviewer.jsonviewer import JsonViewer
@@ -13,6 +13,10 @@ from pdfviewer.pdfviewer import PdfViewer
 from imageviewer.imageviewer import ImageViewer
 
 
+# Bytes read for content based mime type detection
+MIME_SNIFF_SIZE = 16 * 1024
+
+
 class DefaultPolicy(Enum):
     NeverDefault = auto()
     DefaultToTxtViewer = auto()
@@ -30,10 +34,19 @@ class ViewerFactory:
         self._displayWidget = displayWidget
         self._mainWindow = mainWindow
         self._mimeTypes = []
+        self._mimeDatabase = QMimeDatabase()
+        # (path, modification time, size) -> QMimeType
+        self._mimeCache = {}
+        # mime type name -> viewer or None
+        self._dispatch = {}
         for v in [PdfViewer(), JsonViewer(), TxtViewer(), ImageViewer()]:
             self._viewers[v.viewerName()] = v
             if v.isDefaultViewer():
                 self._defaultViewer = v
+        for name in self.supportedMimeTypes():
+            mimeType = self._mimeDatabase.mimeTypeForName(name)
+            if mimeType.isValid():
+                self._dispatch[name] = self._findViewer(mimeType)
 
     def defaultPolicy(self):
         return self._defaultPolicy
@@ -48,18 +61,36 @@ class ViewerFactory:
         self._defaultWarning = on
 
     def viewer(self, file):
-        info = QFileInfo(file)
-        db = QMimeDatabase()
-        mimeType = db.mimeTypeForFile(info)
+        viewer = self.viewerForFile(file)
+        if viewer:
+            viewer.init(file, self._displayWidget, self._mainWindow)
+        return viewer
 
+    def viewerForFile(self, file):
+        """Return the viewer for file without initializing it"""
+        mimeType = self.mimeTypeForFile(file)
         viewer = self.viewerForMimeType(mimeType)
         if not viewer:
             print(f"Mime type {mimeType.name()} not supported.")
-            return None
-
-        viewer.init(file, self._displayWidget, self._mainWindow)
         return viewer
 
+    def mimeTypeForFile(self, file):
+        """Detect the mime type like QMimeDatabase.mimeTypeForFile(),
+           caching results until the file is modified"""
+        info = QFileInfo(file)
+        key = (info.absoluteFilePath(), info.lastModified().toMSecsSinceEpoch(), info.size())
+        mimeType = self._mimeCache.get(key)
+        if mimeType is not None:
+            return mimeType
+
+        header = b""
+        if file.open(QIODevice.OpenModeFlag.ReadOnly):
+            header = file.read(MIME_SNIFF_SIZE).data()
+            file.close()
+        mimeType = self._mimeDatabase.mimeTypeForFileNameAndData(info.fileName(), header)
+        self._mimeCache[key] = mimeType
+        return mimeType
+
     def viewerNames(self, showDefault=False):
         if not showDefault:
             return self._viewers.keys()
@@ -82,13 +113,24 @@ class ViewerFactory:
         print(f"Plugin {viewerName} not loaded.")
         return None
 
-    def viewerForMimeType(self, mimeType):
+    def _findViewer(self, mimeType):
         for viewer in self.viewers():
             for type in viewer.supportedMimeTypes():
                 if mimeType.inherits(type):
                     return viewer
+        return None
+
+    def viewerForMimeType(self, mimeType):
+        name = mimeType.name()
+        if name not in self._dispatch:
+            self._dispatch[name] = self._findViewer(mimeType)
+        viewer = self._dispatch[name]
+        if viewer:
+            return viewer
 
         viewer = self.defaultViewer()
+        if not viewer:
+            return None
 
         if self._defaultWarning:
             mbox = QMessageBox()
@@ -3,16 +3,20 @@
 
 from PySide6.QtQuick3D import QQuick3DTextureData
 from PySide6.QtQml import QmlElement
-from PySide6.QtGui import QImage, QVector3D
+from PySide6.QtGui import QVector3D
 from PySide6.QtCore import QByteArray, QObject, Property, Slot, Signal
 
 from request import OSMTileData, OSMRequest
+from texturedecoder import TextureDecoder
 
 # To be used on the @QmlElement decorator
 # (QML_IMPORT_MINOR_VERSION is optional)
 QML_IMPORT_NAME = "OSMBuildings"
 QML_IMPORT_MAJOR_VERSION = 1
 
+# Tiles requested around the camera, in each direction
+VISIBLE_TILE_RANGE = range(-20, 21)
+
 
 @QmlElement
 class OSMManager(QObject):
@@ -26,6 +30,7 @@ class OSMManager(QObject):
         self.m_startBuildingTileY = 10746
         self.m_tileSizeX = 37
         self.m_tileSizeY = 37
+        self.m_visibleTilesKey = None
         self.m_request.mapsDataReady.connect(self._slotMapsDataReady)
 
     def tileSizeX(self):
@@ -51,27 +56,35 @@ class OSMManager(QObject):
         forwardVector = QVector3D.crossProduct(right, QVector3D(0.0, 0.0, -1.0)).normalized()
         projectionOfForwardOnXY = position + forwardVector * tiltFactor * zoomFactor * 50.0
 
-        queue = []
-        for forwardIndex in range(-20, 21):
-            for sidewardIndex in range(-20, 21):
-                vx = float(self.m_tileSizeX * sidewardIndex)
-                vy = float(self.m_tileSizeY * forwardIndex)
-                transferredPosition = projectionOfForwardOnXY + QVector3D(vx, vy, 0)
-                tile_x = self.m_startBuildingTileX + int(transferredPosition.x() / self.m_tileSizeX)
-                tile_y = self.m_startBuildingTileY - int(transferredPosition.y() / self.m_tileSizeY)
-                self.addBuildingRequestToQueue(queue, tile_x, tile_y)
+        # The grid is separable, its columns only depend on x and its rows on y
+        columns = {self.m_startBuildingTileX
+                   + int((projectionOfForwardOnXY.x() + self.m_tileSizeX * index)
+                         / self.m_tileSizeX) for index in VISIBLE_TILE_RANGE}
+        rows = {self.m_startBuildingTileY
+                - int((projectionOfForwardOnXY.y() + self.m_tileSizeY * index)
+                      / self.m_tileSizeY) for index in VISIBLE_TILE_RANGE}
 
         projectedTileX = (self.m_startBuildingTileX + int(projectionOfForwardOnXY.x()
                           / self.m_tileSizeX))
         projectedTileY = (self.m_startBuildingTileY - int(projectionOfForwardOnXY.y()
                           / self.m_tileSizeY))
 
-        def tile_sort_key(tile_data):
-            return tile_data.distanceTo(projectedTileX, projectedTileY)
+        # Camera moves within the projected tile do not change the queue
+        key = (projectedTileX, projectedTileY, frozenset(columns), frozenset(rows))
+        if key == self.m_visibleTilesKey:
+            return
+        self.m_visibleTilesKey = key
 
-        queue.sort(key=tile_sort_key)
+        def tile_sort_key(tile):
+            deltaX = tile[0] - projectedTileX
+            deltaY = tile[1] - projectedTileY
+            return deltaX * deltaX + deltaY * deltaY
 
-        self.m_request.getMapsData(queue.copy())
+        tiles = sorted(((x, y) for y in rows for x in columns), key=tile_sort_key)
+        queue = []
+        for tileX, tileY in tiles:
+            self.addBuildingRequestToQueue(queue, tileX, tileY)
+        self.m_request.getMapsData(queue)
 
     def addBuildingRequestToQueue(self, queue, tileX, tileY, zoomLevel=15):
         queue.append(OSMTileData(tileX, tileY, zoomLevel))
@@ -97,8 +110,11 @@ class CustomTextureData(QQuick3DTextureData):
 
     @Slot(QByteArray)
     def setImageData(self, data):
-        image = QImage.fromData(data).convertToFormat(QImage.Format.Format_RGBA8888)
-        self.setTextureData(QByteArray(bytearray(image.constBits())))
-        self.setSize(image.size())
+        TextureDecoder.instance().decode(data, self)
+
+    def setTexture(self, pixels, size):
+        """Set RGBA8888 pixels decoded by the TextureDecoder"""
+        self.setTextureData(pixels)
+        self.setSize(size)
         self.setHasTransparency(False)
         self.setFormat(QQuick3DTextureData.Format.RGBA8)
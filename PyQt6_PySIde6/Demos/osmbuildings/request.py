@@ -2,17 +2,23 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 
 import math
+import re
 import sys
+from collections import deque
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from functools import partial
 
 from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
-from PySide6.QtCore import (QByteArray, QTimer, QFile, QFileInfo,
-                            QObject, QUrl, Signal, Slot)
+from PySide6.QtCore import QByteArray, QDateTime, QObject, QUrl, Signal, Slot
+
+from tilecache import DEFAULT_MAX_AGE, TileCache
 
 # %1 = zoom level(is dynamic), %2 = x tile number, %3 = y tile number
 URL_OSMB_MAP = "https://tile-a.openstreetmap.fr/hot/{}/{}/{}.png"
 
+MAX_CONCURRENT_REQUESTS = 6
+
 
 @dataclass
 class OSMTileData:
@@ -43,6 +49,25 @@ def tileKey(tile):
     return f"{tile.ZoomLevel},{tile.TileX},{tile.TileY}"
 
 
+def maxAge(reply):
+    """Return for how many seconds a reply may be used without revalidation,
+       following its Cache-Control or Expires header"""
+    cacheControl = reply.rawHeader("Cache-Control").data().decode().lower()
+    if "no-cache" in cacheControl or "no-store" in cacheControl:
+        return 0
+    match = re.search(r"max-age=(\d+)", cacheControl)
+    if match:
+        return int(match.group(1))
+    expires = reply.rawHeader("Expires").data().decode()
+    if expires:
+        try:
+            expiry = parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return 0
+        return max(0, int(expiry) - QDateTime.currentSecsSinceEpoch())
+    return DEFAULT_MAX_AGE
+
+
 class OSMRequest(QObject):
 
     mapsDataReady = Signal(QByteArray, int, int, int)
@@ -50,31 +75,22 @@ class OSMRequest(QObject):
     def __init__(self, parent):
         super().__init__(parent)
 
-        self.m_mapsNumberOfRequestsInFlight = 0
-        self.m_queuesTimer = QTimer()
-        self.m_queuesTimer.setInterval(0)
         self.m_buildingsQueue = []
-        self.m_mapsQueue = []
+        # Tiles to load, nearest first
+        self.m_mapsQueue = deque()
+        self.m_mapsWanted = set()
+        # Tiles being loaded -> their QNetworkReply, None while read from the cache
+        self.m_mapsInFlight = {}
+        self.m_mapsDelivered = set()
         self.m_networkAccessManager = QNetworkAccessManager()
         self.m_token = ""
+        self.m_tileCache = TileCache(tileKey, parent=self)
+        self.m_tileCache.tileLoaded.connect(self._tileLoaded)
+        self.m_tileCache.tileMissing.connect(self._tileMissing)
 
-        self.m_queuesTimer.timeout.connect(self._slotTimeOut)
-        self.m_queuesTimer.setInterval(0)
         self.m_lastBuildingsDataError = ""
         self.m_lastMapsDataError = ""
 
-    @Slot()
-    def _slotTimeOut(self):
-        if not self.m_buildingsQueue and not self.m_mapsQueue:
-            self.m_queuesTimer.stop()
-        else:
-            numConcurrentRequests = 6
-            if self.m_mapsQueue and self.m_mapsNumberOfRequestsInFlight < numConcurrentRequests:
-                self.getMapsDataRequest(self.m_mapsQueue[0])
-                del self.m_mapsQueue[0]
-
-                self.m_mapsNumberOfRequestsInFlight += 1
-
     def isDemoToken(self):
         return not self.m_token
 
@@ -88,41 +104,85 @@ class OSMRequest(QObject):
         if not buildingsQueue:
             return
         self.m_buildingsQueue = buildingsQueue
-        if not self.m_queuesTimer.isActive():
-            self.m_queuesTimer.start()
 
     def getMapsData(self, mapsQueue):
-        if not mapsQueue:
-            return
-        self.m_mapsQueue = mapsQueue
-        if not self.m_queuesTimer.isActive():
-            self.m_queuesTimer.start()
+        """Load the tiles of mapsQueue, sorted by priority, replacing the
+           previous queue. Tiles which were delivered or are in flight are
+           skipped, requests for tiles no longer wanted are cancelled."""
+        self.m_mapsWanted = set(mapsQueue)
+        self.m_mapsQueue = deque()
+        queued = set()
+        for tile in mapsQueue:
+            if (tile in queued or tile in self.m_mapsDelivered
+                    or tile in self.m_mapsInFlight):
+                continue
+            queued.add(tile)
+            self.m_mapsQueue.append(tile)
+
+        # Aborted replies finish right away and refill their slots
+        for tile, reply in list(self.m_mapsInFlight.items()):
+            if tile not in self.m_mapsWanted and reply is not None:
+                reply.abort()
+        self._startMapsRequests()
+
+    def _startMapsRequests(self):
+        while self.m_mapsQueue and len(self.m_mapsInFlight) < MAX_CONCURRENT_REQUESTS:
+            self.getMapsDataRequest(self.m_mapsQueue.popleft())
+
+    def _mapsRequestFinished(self, tile):
+        del self.m_mapsInFlight[tile]
+        self._startMapsRequests()
 
     def getMapsDataRequest(self, tile):
-        fileName = "data/" + tileKey(tile) + ".png"
-        if QFileInfo.exists(fileName):
-            file = QFile(fileName)
-            if file.open(QFile.OpenModeFlag.ReadOnly):
-                data = file.readAll()
-                file.close()
-                self.mapsDataReady.emit(data, tile.TileX, tile.TileY, tile.ZoomLevel)
-                self.m_mapsNumberOfRequestsInFlight -= 1
-                return
+        self.m_mapsInFlight[tile] = None
+        self.m_tileCache.load(tile)
+
+    @Slot(object, QByteArray, str, bool)
+    def _tileLoaded(self, tile, data, etag, stale):
+        self.m_mapsDelivered.add(tile)
+        self.mapsDataReady.emit(data, tile.TileX, tile.TileY, tile.ZoomLevel)
+        if stale and tile in self.m_mapsWanted:
+            self._requestTile(tile, etag)
+        else:
+            self._mapsRequestFinished(tile)
 
+    @Slot(object)
+    def _tileMissing(self, tile):
+        if tile in self.m_mapsWanted:
+            self._requestTile(tile)
+        else:
+            self._mapsRequestFinished(tile)
+
+    def _requestTile(self, tile, etag=""):
         url = QUrl(URL_OSMB_MAP.format(tile.ZoomLevel, tile.TileX, tile.TileY))
-        reply = self.m_networkAccessManager.get(QNetworkRequest(url))
+        request = QNetworkRequest(url)
+        if etag:
+            # Revalidate a stale cached tile, unchanged ones are not sent again
+            request.setRawHeader(b"If-None-Match", etag.encode())
+        reply = self.m_networkAccessManager.get(request)
+        self.m_mapsInFlight[tile] = reply
         reply.finished.connect(partial(self._mapsDataReceived, reply, tile))
 
     @Slot(OSMTileData)
     def _mapsDataReceived(self, reply, tile):
         reply.deleteLater()
         if reply.error() == QNetworkReply.NetworkError.NoError:
-            data = reply.readAll()
-            self.mapsDataReady.emit(data, tile.TileX, tile.TileY, tile.ZoomLevel)
-        else:
+            status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+            if status == 304:
+                self.m_tileCache.refresh(tile, maxAge(reply))
+            else:
+                data = reply.readAll()
+                # A stale tile shown from the cache is not sent again, the view
+                # would add a second model; the new data is shown next time.
+                if tile not in self.m_mapsDelivered:
+                    self.m_mapsDelivered.add(tile)
+                    self.mapsDataReady.emit(data, tile.TileX, tile.TileY, tile.ZoomLevel)
+                etag = reply.rawHeader("ETag").data().decode()
+                self.m_tileCache.store(tile, data, etag, maxAge(reply))
+        elif reply.error() != QNetworkReply.NetworkError.OperationCanceledError:
             message = reply.readAll().data().decode('utf-8')
             if message != self.m_lastMapsDataError:
                 self.m_lastMapsDataError = message
                 print("OSMRequest.getMapsDataRequest", reply.error(),
                       reply.url(), message, file=sys.stderr)
-        self.m_mapsNumberOfRequestsInFlight -= 1
+        self._mapsRequestFinished(tile)
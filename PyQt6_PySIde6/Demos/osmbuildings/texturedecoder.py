@@ -0,0 +1,80 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+
+import hashlib
+from collections import OrderedDict
+
+from shiboken6 import isValid
+from PySide6.QtGui import QImage
+from PySide6.QtCore import QByteArray, QCoreApplication, QObject, QSize, QThreadPool, Signal, Slot
+
+TEXTURE_CACHE_SIZE = 64 * 1024 * 1024  # bytes, 256 tiles of 256x256 pixels
+
+_instance = None
+
+
+class TextureDecoder(QObject):
+    """Decodes map tile images to RGBA8888 texture data on a thread pool.
+       The decoded textures are cached by the content of the image, least
+       recently used first out, so that revisited and identical tiles, like
+       those of the sea, are decoded once."""
+
+    # key, pixels, size
+    textureDecoded = Signal(str, QByteArray, QSize)
+
+    def __init__(self, maximumSize=TEXTURE_CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.m_pool = QThreadPool(self)
+        self.m_maximumSize = maximumSize
+        self.m_cache = OrderedDict()  # key -> (pixels, size)
+        self.m_cacheSize = 0
+        self.m_pending = {}  # key -> textures waiting for it
+        self.textureDecoded.connect(self._textureDecoded)
+
+    @staticmethod
+    def instance():
+        global _instance
+        if _instance is None:
+            _instance = TextureDecoder(parent=QCoreApplication.instance())
+        return _instance
+
+    def decode(self, data, texture):
+        """Decode the image data and pass it to texture.setTexture"""
+        key = hashlib.blake2b(data, digest_size=16).hexdigest()
+        cached = self.m_cache.get(key)
+        if cached is not None:
+            self.m_cache.move_to_end(key)
+            texture.setTexture(*cached)
+            return
+        textures = self.m_pending.get(key)
+        if textures is not None:
+            textures.append(texture)
+            return
+        self.m_pending[key] = [texture]
+        data = QByteArray(data)
+        self.m_pool.start(lambda: self._decode(key, data))
+
+    def _decode(self, key, data):
+        image = QImage.fromData(data)
+        if image.isNull():
+            self.textureDecoded.emit(key, QByteArray(), QSize())
+            return
+        image.convertTo(QImage.Format.Format_RGBA8888)
+        # Copy the pixels once, into the buffer handed to the texture
+        pixels = QByteArray(image.sizeInBytes(), 0)
+        memoryview(pixels)[:] = image.constBits()
+        self.textureDecoded.emit(key, pixels, image.size())
+
+    @Slot(str, QByteArray, QSize)
+    def _textureDecoded(self, key, pixels, size):
+        textures = self.m_pending.pop(key, [])
+        if pixels.isEmpty():
+            return
+        self.m_cache[key] = (pixels, size)
+        self.m_cacheSize += pixels.size()
+        while self.m_cacheSize > self.m_maximumSize and len(self.m_cache) > 1:
+            evicted, _ = self.m_cache.popitem(last=False)[1]
+            self.m_cacheSize -= evicted.size()
+        for texture in textures:
+            if isValid(texture):
+                texture.setTexture(pixels, size)
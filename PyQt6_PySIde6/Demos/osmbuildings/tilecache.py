@@ -0,0 +1,136 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+
+import json
+import os
+import sys
+import time
+
+from PySide6.QtCore import (QByteArray, QCoreApplication, QObject, QStandardPaths,
+                            QThreadPool, Signal, Slot)
+
+TILE_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+# Tiles are kept at least this long when the server sends no caching headers
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # s
+
+
+def defaultCacheDirectory():
+    location = QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.GenericCacheLocation)
+    return os.path.join(location, "osmbuildings", "tiles")
+
+
+class TileCache(QObject):
+    """A disk cache of map tiles, bounded by size with least recently used
+       tiles evicted first. The tiles are stored as <key>.png with their
+       ETag and expiry time in <key>.json. All file operations run in order
+       on one worker thread, results are signalled to the GUI thread."""
+
+    # tile, data, etag, stale
+    tileLoaded = Signal(object, QByteArray, str, bool)
+    tileMissing = Signal(object)
+
+    def __init__(self, tileKey, directory=None, maximumSize=TILE_CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.m_tileKey = tileKey
+        self.m_directory = directory or defaultCacheDirectory()
+        self.m_maximumSize = maximumSize
+        self.m_pool = QThreadPool(self)
+        self.m_pool.setMaxThreadCount(1)
+        QCoreApplication.instance().aboutToQuit.connect(self.flush)
+        # Worker thread state: key -> [size, last use], built on first use
+        self.m_entries = None
+        self.m_size = 0
+
+    def load(self, tile):
+        """Emit tileLoaded or tileMissing for a tile"""
+        self.m_pool.start(lambda: self._load(tile))
+
+    def store(self, tile, data, etag, maxAge):
+        self.m_pool.start(lambda: self._store(tile, QByteArray(data), etag, maxAge))
+
+    def refresh(self, tile, maxAge):
+        """Extend the expiry of a tile the server did not modify"""
+        self.m_pool.start(lambda: self._refresh(tile, maxAge))
+
+    @Slot()
+    def flush(self):
+        self.m_pool.waitForDone()
+
+    def _path(self, tile, suffix):
+        return os.path.join(self.m_directory, self.m_tileKey(tile) + suffix)
+
+    def _scan(self):
+        self.m_entries = {}
+        self.m_size = 0
+        os.makedirs(self.m_directory, exist_ok=True)
+        with os.scandir(self.m_directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    self.m_entries[entry.name[:-4]] = [stat.st_size, stat.st_mtime]
+                    self.m_size += stat.st_size
+
+    def _load(self, tile):
+        if self.m_entries is None:
+            self._scan()
+        key = self.m_tileKey(tile)
+        try:
+            with open(self._path(tile, ".png"), "rb") as f:
+                data = f.read()
+            with open(self._path(tile, ".json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self.tileMissing.emit(tile)
+            return
+        now = time.time()
+        os.utime(self._path(tile, ".png"))
+        if key in self.m_entries:
+            self.m_entries[key][1] = now
+        stale = meta.get("expires", 0) < now
+        self.tileLoaded.emit(tile, QByteArray(data), meta.get("etag", ""), stale)
+
+    def _store(self, tile, data, etag, maxAge):
+        if self.m_entries is None:
+            self._scan()
+        key = self.m_tileKey(tile)
+        try:
+            with open(self._path(tile, ".png"), "wb") as f:
+                f.write(data.data())
+            self._writeMeta(tile, etag, maxAge)
+        except OSError as e:
+            print("TileCache:", e, file=sys.stderr)
+            return
+        previous = self.m_entries.get(key)
+        if previous:
+            self.m_size -= previous[0]
+        self.m_entries[key] = [data.size(), time.time()]
+        self.m_size += data.size()
+        if self.m_size > self.m_maximumSize:
+            self._evict()
+
+    def _refresh(self, tile, maxAge):
+        try:
+            with open(self._path(tile, ".json")) as f:
+                meta = json.load(f)
+            self._writeMeta(tile, meta.get("etag", ""), maxAge)
+        except (OSError, ValueError) as e:
+            print("TileCache:", e, file=sys.stderr)
+
+    def _writeMeta(self, tile, etag, maxAge):
+        with open(self._path(tile, ".json"), "w") as f:
+            json.dump({"etag": etag, "expires": time.time() + maxAge}, f)
+
+    def _evict(self):
+        """Remove the least recently used tiles down to 90% of the size"""
+        target = self.m_maximumSize * 9 // 10
+        for key, (size, _) in sorted(self.m_entries.items(), key=lambda e: e[1][1]):
+            if self.m_size <= target:
+                break
+            for suffix in (".png", ".json"):
+                try:
+                    os.remove(os.path.join(self.m_directory, key + suffix))
+                except OSError:
+                    pass
+            del self.m_entries[key]
+            self.m_size -= size
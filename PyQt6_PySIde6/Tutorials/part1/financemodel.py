@@ -44,6 +44,8 @@ class FinanceModel(QAbstractListModel):
                                             "16-01-2024"))
         self.m_finances.append(self.Finance("Bus Ticket", "Transport", 5.50, "17-01-2024"))
         self.m_finances.append(self.Finance("Book", "Education", 25.00, "18-01-2024"))
+        # Totals per category, summed again after an item was added
+        self.m_categoryData = None
 
     def rowCount(self, parent=QModelIndex()):
         return len(self.m_finances)
@@ -66,10 +68,12 @@ class FinanceModel(QAbstractListModel):
 
     @Slot(result=dict)
     def getCategoryData(self):
-        category_data = defaultdict(float)
-        for finance in self.m_finances:
-            category_data[finance.category] += finance.cost
-        return dict(category_data)
+        if self.m_categoryData is None:
+            category_data = defaultdict(float)
+            for finance in self.m_finances:
+                category_data[finance.category] += finance.cost
+            self.m_categoryData = dict(category_data)
+        return dict(self.m_categoryData)
 
     def roleNames(self):
         roles = super().roleNames()
@@ -92,3 +96,4 @@ class FinanceModel(QAbstractListModel):
         self.beginInsertRows(QModelIndex(), 0, 0)  # Insert at the front
         self.m_finances.insert(0, finance)  # Insert at the front of the list
         self.endInsertRows()
+        self.m_categoryData = None
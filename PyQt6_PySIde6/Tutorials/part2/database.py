@@ -1,8 +1,9 @@
 # Copyright (C) 2024 The Qt Company Ltd.
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 
-from sqlalchemy import create_engine, Column, Integer, String, Float
+from sqlalchemy import create_engine, func, Index, Column, Integer, String, Float
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker
 import os
 import platform
@@ -19,6 +20,13 @@ class Finance(Base):
     cost = Column(Float)
     date = Column(String)
 
+    # Cover the sums per category and per month, the month of a dd-mm-yyyy
+    # date being mm-yyyy
+    __table_args__ = (
+        Index('ix_finances_category_cost', category, cost),
+        Index('ix_finances_month_cost', func.substr(date, 4), cost),
+    )
+
 
 # Check for an environment variable for the database path
 env_db_path = os.getenv('FINANCE_MANAGER_DB_PATH')
@@ -53,6 +61,11 @@ default_data = [
 def initialize_database():
     if db_path.exists():
         print(f"Database '{db_path}' already exists.")
+        # Add the indexes missing in databases created by earlier versions.
+        # Reflection does not see expression indexes, so checkfirst can't be used
+        with engine.begin() as connection:
+            for index in Finance.__table__.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
         return
 
     app_data_location.mkdir(parents=True, exist_ok=True)
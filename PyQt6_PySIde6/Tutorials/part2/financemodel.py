@@ -4,11 +4,11 @@
 from datetime import datetime
 from dataclasses import dataclass
 from enum import IntEnum
-from collections import defaultdict
 
 from PySide6.QtCore import (QAbstractListModel, QEnum, Qt, QModelIndex, Slot,
                             QByteArray)
 from PySide6.QtQml import QmlElement
+from sqlalchemy import func
 import database
 
 QML_IMPORT_NAME = "Finance"
@@ -41,6 +41,8 @@ class FinanceModel(QAbstractListModel):
         super().__init__(parent)
         self.session = database.Session()
         self.m_finances = self.load_finances()
+        # Totals per category, queried again after an item was added
+        self.m_categoryData = None
 
     def load_finances(self):
         finances = []
@@ -70,10 +72,12 @@ class FinanceModel(QAbstractListModel):
 
     @Slot(result=dict)
     def getCategoryData(self):
-        category_data = defaultdict(float)
-        for finance in self.m_finances:
-            category_data[finance.category] += finance.cost
-        return dict(category_data)
+        if self.m_categoryData is None:
+            query = (self.session.query(database.Finance.category,
+                                        func.sum(database.Finance.cost))
+                     .group_by(database.Finance.category))
+            self.m_categoryData = dict(query.all())
+        return dict(self.m_categoryData)
 
     def roleNames(self):
         roles = super().roleNames()
@@ -99,3 +103,4 @@ class FinanceModel(QAbstractListModel):
         self.m_finances.insert(0, finance)  # Insert at the front of the list
         self.endInsertRows()
         self.session.commit()
+        self.m_categoryData = None
@@ -0,0 +1,53 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+
+import importlib
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+DIRECTORY = os.fspath(Path(__file__).resolve().parent)
+INDEXES = {"ix_finances_category_cost", "ix_finances_month_cost"}
+
+
+class InitializeDatabaseTest(unittest.TestCase):
+    """initialize_database on a temporary home directory"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        home = self.directory.name
+        patcher = mock.patch.dict(os.environ, {"HOME": home, "APPDATA": home})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sys.path.insert(0, DIRECTORY)
+        self.addCleanup(sys.path.remove, DIRECTORY)
+        sys.modules.pop("database", None)
+        self.database = importlib.import_module("database")
+        self.addCleanup(self.database.engine.dispose)
+        self.addCleanup(self.directory.cleanup)
+
+    def indexes(self):
+        with sqlite3.connect(self.database.db_path) as connection:
+            rows = connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            return {name for (name,) in rows}
+
+    def test_initialize_twice(self):
+        self.database.initialize_database()
+        self.database.initialize_database()
+        self.assertTrue(INDEXES <= self.indexes())
+
+    def test_add_missing_indexes(self):
+        self.database.initialize_database()
+        with sqlite3.connect(self.database.db_path) as connection:
+            for name in INDEXES:
+                connection.execute(f"DROP INDEX {name}")
+        self.database.initialize_database()
+        self.assertTrue(INDEXES <= self.indexes())
+
+
+if __name__ == "__main__":
+    unittest.main()
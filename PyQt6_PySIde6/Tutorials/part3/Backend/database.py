@@ -1,8 +1,10 @@
 # Copyright (C) 2024 The Qt Company Ltd.
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 
-from sqlalchemy import create_engine, Column, Integer, String, Float
+from sqlalchemy import create_engine, func, Index, event, Column, Integer, String, Float
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker
 import os
 import platform
@@ -19,21 +21,71 @@ class Finance(Base):
     cost = Column(Float)
     date = Column(String)
 
+    # Cover the sums per category and per month, the month of a dd-mm-yyyy
+    # date being mm-yyyy
+    __table_args__ = (
+        Index('ix_finances_category_cost', category, cost),
+        Index('ix_finances_month_cost', func.substr(date, 4), cost),
+    )
 
-# Determine the application data directory based on the operating system using pathlib
-if platform.system() == 'Windows':
-    app_data_location = Path(os.getenv('APPDATA')) / 'FinanceManager'
-elif platform.system() == 'Darwin':  # macOS
-    app_data_location = Path.home() / 'Library' / 'Application Support' / 'FinanceManager'
-else:  # Linux and other Unix-like systems
-    app_data_location = Path.home() / '.local' / 'share' / 'FinanceManager'
 
-db_path = app_data_location / 'finances.db'
+# Check for an environment variable for the database path
+env_db_path = os.getenv('FINANCE_MANAGER_DB_PATH')
+
+if env_db_path:
+    db_path = Path(env_db_path)
+else:
+    # Determine the application data directory based on the operating system using pathlib
+    if platform.system() == 'Windows':
+        app_data_location = Path(os.getenv('APPDATA')) / 'FinanceManager'
+    elif platform.system() == 'Darwin':  # macOS
+        app_data_location = Path.home() / 'Library' / 'Application Support' / 'FinanceManager'
+    else:  # Linux and other Unix-like systems
+        app_data_location = Path.home() / '.local' / 'share' / 'FinanceManager'
+
+    db_path = app_data_location / 'finances.db'
 
 DATABASE_URL = f'sqlite:///{db_path}'
+ASYNC_DATABASE_URL = f'sqlite+aiosqlite:///{db_path}'
+
+# Connections kept open for the requests, each aiosqlite connection runs on
+# its own thread. SQLite allows one writer at a time, with WAL readers do not
+# wait for it. Overflow connections would be opened and closed again in
+# bursts, so requests rather wait for a pooled one.
+POOL_SIZE = 8
+POOL_MAX_OVERFLOW = 0
+POOL_TIMEOUT = 30  # s
+
+# Applied to every new connection. WAL is stored in the database file, the
+# others are per connection.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    # Only sync the WAL at checkpoints, a commit may be lost on power failure
+    # but the database stays consistent
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms to wait for the write lock
+    "cache_size": -64000,  # KiB
+    "temp_store": "MEMORY",
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+}
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
 engine = create_engine(DATABASE_URL)
+event.listen(engine, "connect", set_sqlite_pragmas)
 Session = sessionmaker(bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=POOL_SIZE,
+                                   max_overflow=POOL_MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+async_session = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 # Default data to be added to the database
 default_data = [
     {"item_name": "Mobile Prepaid", "category": "Electronics", "cost": 20.00, "date": "15-02-2024"},
@@ -47,9 +99,14 @@ default_data = [
 def initialize_database():
     if db_path.exists():
         print(f"Database '{db_path}' already exists.")
+        # Add the indexes missing in databases created by earlier versions.
+        # Reflection does not see expression indexes, so checkfirst can't be used
+        with engine.begin() as connection:
+            for index in Finance.__table__.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
         return
 
-    app_data_location.mkdir(parents=True, exist_ok=True)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
     Base.metadata.create_all(engine)
     print(f"Database '{db_path}' created successfully.")
     session = Session()
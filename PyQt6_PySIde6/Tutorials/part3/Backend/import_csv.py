@@ -0,0 +1,52 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+
+import csv
+import json
+import sys
+import time
+import urllib.request
+from argparse import ArgumentParser
+
+BULK_URL = "http://127.0.0.1:8000/finances/bulk"
+CHUNK_SIZE = 10000  # rows per request
+
+
+def post_chunk(url, rows):
+    request = urllib.request.Request(url, data=json.dumps(rows).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["inserted"]
+
+
+def import_csv(path, url=BULK_URL, chunk_size=CHUNK_SIZE):
+    """Import a CSV file with the columns item_name, category, cost and date
+       through the bulk endpoint, return the number of imported rows"""
+    imported = 0
+    with open(path, newline="", encoding="utf-8") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append({"item_name": row["item_name"], "category": row["category"],
+                          "cost": float(row["cost"]), "date": row["date"]})
+            if len(chunk) == chunk_size:
+                imported += post_chunk(url, chunk)
+                chunk = []
+        if chunk:
+            imported += post_chunk(url, chunk)
+    return imported
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="Import finances from a CSV file")
+    arg_parser.add_argument("file", help="CSV file with a header row")
+    arg_parser.add_argument("--url", default=BULK_URL)
+    arg_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        count = import_csv(args.file, args.url, args.chunk_size)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Imported {count} rows in {time.perf_counter() - start:.1f} s")
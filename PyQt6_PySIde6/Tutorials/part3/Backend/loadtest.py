@@ -0,0 +1,142 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+import httpx
+
+DEFAULT_CLIENTS = 100
+DEFAULT_DURATION = 10  # s
+DEFAULT_ROWS = 100000  # rows in the test database
+WRITE_RATIO = 0.2  # fraction of requests adding an item
+PAGE_SIZE = 50  # rows per read
+SEED_CHUNK_SIZE = 10000  # rows per bulk request
+STARTUP_TIMEOUT = 30  # s
+CATEGORIES = ["Electronics", "Groceries", "Transport", "Education", "Test"]
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, port):
+    """Start the backend on a throwaway database, return the process and its url.
+       The items added by the test never reach the database of the application."""
+    backend = Path(__file__).resolve().parent
+    env = dict(os.environ, FINANCE_MANAGER_DB_PATH=str(db_path))
+    subprocess.run([sys.executable, "-c", "from database import initialize_database; "
+                    "initialize_database()"], cwd=backend, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "rest_api:app",
+                                "--host", "127.0.0.1", "--port", str(port),
+                                "--log-level", "warning"], cwd=backend, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while time.perf_counter() < deadline:
+        try:
+            httpx.get(f"{url}/finances/", params={"limit": 1}).raise_for_status()
+            return process, url
+        except httpx.HTTPError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    sys.exit("The backend failed to start")
+
+
+async def seed(client, rows, rng):
+    """Add rows random items through the bulk endpoint"""
+    for start in range(0, rows, SEED_CHUNK_SIZE):
+        chunk = [{"item_name": f"Item {i}", "category": rng.choice(CATEGORIES),
+                  "cost": round(rng.uniform(1, 100), 2),
+                  "date": f"{rng.randint(1, 28):02}-{rng.randint(1, 12):02}-2024"}
+                 for i in range(start, min(start + SEED_CHUNK_SIZE, rows))]
+        response = await client.post("/finances/bulk", json=chunk)
+        response.raise_for_status()
+
+
+async def read_max_id(client):
+    """Return the largest id, ids of deleted rows leave gaps below it"""
+    response = await client.get("/finances/", params={"skip": 0, "limit": 1})
+    total = response.json()["total"]
+    response = await client.get("/finances/", params={"skip": max(0, total - 1), "limit": 1})
+    items = response.json()["items"]
+    return items[0]["id"] if items else 0
+
+
+async def run_client(client, deadline, max_id, latencies, errors, rng):
+    """Read pages and add items until the deadline, like a frontend would"""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if rng.random() < WRITE_RATIO:
+                response = await client.post("/finances/", json={
+                    "item_name": "Load test", "category": "Test",
+                    "cost": round(rng.uniform(1, 100), 2), "date": "01-01-2024"})
+            else:
+                response = await client.get("/finances/", params={
+                    "after_id": rng.randrange(max_id), "limit": PAGE_SIZE})
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors.append(time.perf_counter() - start)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def load_test(url, clients, duration, rows, seed_value=0):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        await seed(client, rows, random.Random(seed_value))
+        max_id = max(1, await read_max_id(client))
+        latencies = []
+        errors = []
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(run_client(client, deadline, max_id, latencies, errors,
+                                           random.Random(seed_value + i))
+                               for i in range(clients)))
+        elapsed = time.perf_counter() - start
+    return {"clients": clients, "elapsed": elapsed, "requests": len(latencies),
+            "errors": len(errors), "requests_per_second": len(latencies) / elapsed,
+            "latency": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                        "max": max(latencies, default=0)}}
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="Load test of the Finance backend, run on "
+                                            "a temporary database")
+    arg_parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS,
+                            help="concurrent clients")
+    arg_parser.add_argument("--duration", type=int, default=DEFAULT_DURATION,
+                            help="time to send requests in s")
+    arg_parser.add_argument("--rows", type=int, default=DEFAULT_ROWS,
+                            help="rows added to the database before the test")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        process, url = start_server(Path(directory) / "finances.db", free_port())
+        try:
+            result = asyncio.run(load_test(url, args.clients, args.duration, args.rows))
+        finally:
+            process.terminate()
+            process.wait()
+    print(json.dumps(result, indent=2))
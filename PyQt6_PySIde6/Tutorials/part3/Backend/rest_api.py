@@ -2,14 +2,23 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 
 import logging
+import re
+from datetime import datetime
 from fastapi import FastAPI, Depends, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any
-from sqlalchemy import orm
-from database import Session, Finance
+from pydantic import BaseModel, field_validator
+from typing import Dict, Any, List, Optional
+from sqlalchemy import func, insert, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import async_session, Finance
 
 app = FastAPI()
 
+# Dates are stored as dd-mm-yyyy, which the frontend parses
+DATE_FORMAT = "%d-%m-%Y"
+DATE_PATTERN = re.compile(r"\d{2}-\d{2}-\d{4}")
+# The month part of a dd-mm-yyyy date
+MONTH_PATTERN = re.compile(r"(0[1-9]|1[0-2])-(\d{4})")
+
 
 class FinanceCreate(BaseModel):
     item_name: str
@@ -17,41 +26,95 @@ class FinanceCreate(BaseModel):
     cost: float
     date: str
 
+    @field_validator("date")
+    @classmethod
+    def check_date(cls, date):
+        # Raising ValueError answers the request with 422
+        if not DATE_PATTERN.fullmatch(date):
+            raise ValueError("date must be in the format dd-mm-yyyy")
+        datetime.strptime(date, DATE_FORMAT)
+        return date
+
 
 class FinanceRead(FinanceCreate):
+    id: int
+
     class Config:
         from_attributes = True
 
 
-def get_db():
-    db = Session()
-    try:
+async def get_db():
+    async with async_session() as db:
         yield db
-    finally:
-        db.close()
 
 
 @app.post("/finances/", response_model=FinanceRead)
-def create_finance(finance: FinanceCreate, db: orm.Session = Depends(get_db)):
+async def create_finance(finance: FinanceCreate, db: AsyncSession = Depends(get_db)):
     print(f"Adding finance item: {finance}")
     db_finance = Finance(**finance.model_dump())
     db.add(db_finance)
-    db.commit()
-    db.refresh(db_finance)
+    await db.commit()
     return db_finance
 
 
+@app.post("/finances/bulk", response_model=Dict[str, Any])
+async def create_finances(finances: List[FinanceCreate],
+                          db: AsyncSession = Depends(get_db)):
+    # One executemany in a single transaction instead of a commit per item
+    try:
+        if finances:
+            await db.execute(insert(Finance.__table__),
+                             [finance.model_dump() for finance in finances])
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logging.error(f"Error occurred: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return {"inserted": len(finances)}
+
+
+@app.get("/finances/summary", response_model=Dict[str, Any])
+async def read_summary(db: AsyncSession = Depends(get_db)):
+    """Return the total cost per category and per month, by yyyy-mm"""
+    # The start is rendered inline, a bound parameter would not match the index
+    month = func.substr(Finance.date, literal_column("4"))
+    try:
+        categories = await db.execute(
+            select(Finance.category, func.sum(Finance.cost)).group_by(Finance.category))
+        months = await db.execute(select(month, func.sum(Finance.cost)).group_by(month))
+    except Exception as e:
+        logging.error(f"Error occurred: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    # Costs are nullable, a group of them only sums to NULL
+    month_totals = {}
+    for key, total in months.all():
+        match = MONTH_PATTERN.fullmatch(key or "")
+        if match is None:
+            logging.warning(f"Skipping finances with malformed dates in month '{key}'")
+            continue
+        month_totals[f"{match.group(2)}-{match.group(1)}"] = total or 0
+    return {"categories": {category: round(total or 0, 2)
+                           for category, total in categories.all()},
+            "months": {key: round(total, 2) for key, total in sorted(month_totals.items())}}
+
+
 @app.get("/finances/", response_model=Dict[str, Any])
-def read_finances(skip: int = 0, limit: int = 10, db: orm.Session = Depends(get_db)):
+async def read_finances(skip: int = 0, limit: int = 10, after_id: Optional[int] = None,
+                        db: AsyncSession = Depends(get_db)):
+    """Return a page of finances ordered by id. With after_id, the page
+       starts after that id using the primary key index, without counting
+       the rows or scanning the skipped ones."""
     try:
-        total = db.query(Finance).count()
-        finances = db.query(Finance).offset(skip).limit(limit).all()
-        response = {
-            "total": total,
-            # Convert the list of Finance objects to a list of FinanceRead objects
-            "items": [FinanceRead.from_orm(finance) for finance in finances]
-        }
-        logging.info(f"Response: {response}")
+        query = select(Finance).order_by(Finance.id).limit(limit)
+        if after_id is not None:
+            finances = (await db.scalars(query.where(Finance.id > after_id))).all()
+            response = {}
+        else:
+            finances = (await db.scalars(query.offset(skip))).all()
+            response = {"total": await db.scalar(select(func.count()).select_from(Finance))}
+        # Convert the list of Finance objects to a list of FinanceRead objects
+        response["items"] = [FinanceRead.from_orm(finance) for finance in finances]
+        logging.info("Response: %s", response)
         return response
     except Exception as e:
         logging.error(f"Error occurred: {e}")
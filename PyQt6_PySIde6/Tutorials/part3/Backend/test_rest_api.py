@@ -0,0 +1,138 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+DIRECTORY = os.fspath(Path(__file__).resolve().parent)
+
+
+def finance(item_name="Item", category="Groceries", cost=1.0, date="01-01-2024"):
+    return {"item_name": item_name, "category": category, "cost": cost, "date": date}
+
+
+class RestApiTest(unittest.TestCase):
+    """The endpoints on a temporary database, emptied of the default data"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        db_path = os.path.join(directory.name, "finances.db")
+        patcher = mock.patch.dict(os.environ, {"FINANCE_MANAGER_DB_PATH": db_path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sys.path.insert(0, DIRECTORY)
+        self.addCleanup(sys.path.remove, DIRECTORY)
+        for name in ("database", "rest_api"):
+            sys.modules.pop(name, None)
+        self.database = importlib.import_module("database")
+        self.addCleanup(self.database.engine.dispose)
+        self.database.initialize_database()
+        with self.database.Session() as session:
+            session.query(self.database.Finance).delete()
+            session.commit()
+
+        rest_api = importlib.import_module("rest_api")
+        self.client = TestClient(rest_api.app)
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+        # The pooled connections belong to the event loop of the client
+        self.addCleanup(self.client.portal.call, self.database.async_engine.dispose)
+
+    def insert(self, *rows):
+        """Insert rows directly, bypassing the validation of the endpoints"""
+        with self.database.Session() as session:
+            session.add_all(self.database.Finance(**row) for row in rows)
+            session.commit()
+
+    def summary(self):
+        response = self.client.get("/finances/summary")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_initialize_twice(self):
+        self.database.initialize_database()
+        self.assertEqual(self.summary(), {"categories": {}, "months": {}})
+
+    def test_summary(self):
+        self.insert(finance(category="Groceries", cost=10.5, date="15-01-2024"),
+                    finance(category="Groceries", cost=2.25, date="03-02-2024"),
+                    finance(category="Transport", cost=5.126, date="31-01-2024"),
+                    finance(category="Transport", cost=1.0, date="01-12-2023"))
+        summary = self.summary()
+        self.assertEqual(summary["categories"], {"Groceries": 12.75, "Transport": 6.13})
+        self.assertEqual(summary["months"], {"2023-12": 1.0, "2024-01": 15.63,
+                                             "2024-02": 2.25})
+        self.assertEqual(list(summary["months"]), sorted(summary["months"]))
+
+    def test_summary_malformed_dates_and_null_costs(self):
+        self.insert(finance(category="Groceries", cost=4.0, date="2024"),
+                    finance(category="Groceries", cost=2.0, date="01-13-2024"),
+                    finance(category="Transport", cost=None, date="01-03-2024"),
+                    finance(category="Education", cost=3.0, date="01-01-2024"))
+        summary = self.summary()
+        self.assertEqual(summary["categories"], {"Groceries": 6.0, "Transport": 0,
+                                                 "Education": 3.0})
+        self.assertEqual(summary["months"], {"2024-01": 3.0, "2024-03": 0})
+
+    def test_bulk(self):
+        rows = [finance(item_name=f"Item {i}", cost=i) for i in range(25)]
+        response = self.client.post("/finances/bulk", json=rows)
+        self.assertEqual(response.json(), {"inserted": 25})
+        response = self.client.get("/finances/", params={"skip": 0, "limit": 100})
+        self.assertEqual(response.json()["total"], 25)
+        items = response.json()["items"]
+        self.assertEqual([item["item_name"] for item in items], [row["item_name"] for row in rows])
+
+    def test_bulk_empty(self):
+        response = self.client.post("/finances/bulk", json=[])
+        self.assertEqual(response.json(), {"inserted": 0})
+
+    def test_bulk_invalid_date(self):
+        for date in ("2024", "1-1-2024", "31-02-2024", "2024-01-01"):
+            rows = [finance(), finance(date=date)]
+            response = self.client.post("/finances/bulk", json=rows)
+            self.assertEqual(response.status_code, 422, date)
+            self.assertEqual(response.json()["detail"][0]["loc"], ["body", 1, "date"])
+        self.assertEqual(self.summary()["categories"], {})
+
+    def test_create_invalid_date(self):
+        response = self.client.post("/finances/", json=finance(date="2024"))
+        self.assertEqual(response.status_code, 422)
+        response = self.client.post("/finances/", json=finance(date="29-02-2024"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_after_id(self):
+        self.client.post("/finances/bulk", json=[finance(cost=i) for i in range(25)])
+        with self.database.Session() as session:
+            Finance = self.database.Finance
+            ids = [id for (id,) in session.query(Finance.id).order_by(Finance.id)]
+            # Leave gaps in the ids
+            session.query(Finance).filter(Finance.id.in_(ids[3:8])).delete()
+            session.commit()
+        remaining = ids[:3] + ids[8:]
+
+        pages = []
+        after_id = 0
+        while True:
+            response = self.client.get("/finances/", params={"after_id": after_id,
+                                                             "limit": 10})
+            page = response.json()
+            self.assertNotIn("total", page)
+            if not page["items"]:
+                break
+            pages.append([item["id"] for item in page["items"]])
+            after_id = pages[-1][-1]
+        self.assertEqual([len(page) for page in pages], [10, 10])
+        self.assertEqual([id for page in pages for id in page], remaining)
+
+
+if __name__ == "__main__":
+    unittest.main()
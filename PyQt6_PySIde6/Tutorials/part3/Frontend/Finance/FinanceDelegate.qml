@@ -9,6 +9,8 @@ import QtQuick.Controls.Material
 ItemDelegate {
     id: delegate
     checkable: true
+    // Dimmed until the server confirms an added item
+    opacity: pending ? 0.5 : 1.0
     width: parent.width
     height: Qt.platform.os == "android" ?
         Math.min(window.width, window.height) * 0.15 :
@@ -83,6 +83,14 @@ ApplicationWindow {
                         var categoryData = finance_model.getCategoryData()
                         updateChart(categoryData)
                     }
+
+                    // The totals are fetched from the server
+                    Connections {
+                        target: finance_model
+                        function onSummaryChanged() {
+                            financePieChart.updateChart(finance_model.getCategoryData())
+                        }
+                    }
                 }
             }
         }
@@ -98,8 +106,6 @@ ApplicationWindow {
         id: addDialog
         onFinished: function(item_name, category, cost, date) {
             finance_model.append(item_name, category, cost, date)
-            var categoryData = finance_model.getCategoryData()
-            financePieChart.updateChart(categoryData)
         }
     }
 
@@ -1,23 +1,30 @@
 # Copyright (C) 2024 The Qt Company Ltd.
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 
-import requests
+import json
 from datetime import datetime
 from dataclasses import dataclass
 from enum import IntEnum
-from collections import defaultdict
+from functools import partial
 
-from PySide6.QtCore import (QAbstractListModel, QEnum, Qt, QModelIndex, Slot,
-                            QByteArray)
+from PySide6.QtCore import (QAbstractListModel, QEnum, Qt, QModelIndex, Signal, Slot,
+                            QByteArray, QUrl, QUrlQuery)
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
 from PySide6.QtQml import QmlElement
 
 QML_IMPORT_NAME = "Finance"
 QML_IMPORT_MAJOR_VERSION = 1
 
+FINANCES_URL = "http://127.0.0.1:8000/finances/"
+SUMMARY_URL = "http://127.0.0.1:8000/finances/summary"
+PAGE_SIZE = 200  # rows per request
+
 
 @QmlElement
 class FinanceModel(QAbstractListModel):
 
+    summaryChanged = Signal()
+
     @QEnum
     class FinanceRole(IntEnum):
         ItemNameRole = Qt.ItemDataRole.DisplayRole
@@ -25,6 +32,7 @@ class FinanceModel(QAbstractListModel):
         CostRole = Qt.ItemDataRole.UserRole + 1
         DateRole = Qt.ItemDataRole.UserRole + 2
         MonthRole = Qt.ItemDataRole.UserRole + 3
+        PendingRole = Qt.ItemDataRole.UserRole + 4
 
     @dataclass
     class Finance:
@@ -32,6 +40,9 @@ class FinanceModel(QAbstractListModel):
         category: str
         cost: float
         date: str
+        id: int = None
+        # Appended, but not yet confirmed by the server
+        pending: bool = False
 
         @property
         def month(self):
@@ -40,17 +51,61 @@ class FinanceModel(QAbstractListModel):
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
         self.m_finances = []
-        self.fetchAllData()
-
-    def fetchAllData(self):
-        response = requests.get("http://127.0.0.1:8000/finances/")
+        # Totals per category from the server, kept until an item is added
+        self.m_categoryData = None
+        self.m_summaryReply = None
+        self.m_summaryStale = False
+        self.m_manager = QNetworkAccessManager(self)
+        # Pages continue after the last id fetched
+        self.m_lastId = 0
+        self.m_atEnd = False
+        # Ids of the rows appended by this model, which the server lists last
+        self.m_appendedIds = set()
+        self.m_fetching = False
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self.m_atEnd
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.m_fetching:
+            return
+        self.m_fetching = True
+        query = QUrlQuery()
+        query.addQueryItem("after_id", str(self.m_lastId))
+        query.addQueryItem("limit", str(PAGE_SIZE))
+        url = QUrl(FINANCES_URL)
+        url.setQuery(query)
+        reply = self.m_manager.get(QNetworkRequest(url))
+        reply.finished.connect(partial(self._pageReceived, reply))
+
+    def _pageReceived(self, reply):
+        reply.deleteLater()
+        self.m_fetching = False
         try:
-            data = response.json()
-        except requests.exceptions.JSONDecodeError:
-            print("Failed to decode JSON response")
+            if reply.error() != QNetworkReply.NetworkError.NoError:
+                raise ValueError(reply.errorString())
+            items = json.loads(reply.readAll().data())["items"]
+        except (ValueError, KeyError) as e:
+            print(f"Failed to fetch finance data: {e}")
+            # Stop fetching, the view would otherwise ask again right away
+            self.m_atEnd = True
+            return
+        self.m_atEnd = len(items) < PAGE_SIZE
+        if items:
+            self.m_lastId = items[-1]["id"]
+        # Leave out the rows appended by this model, they are shown already
+        finances = [self.Finance(**item) for item in items
+                    if item["id"] not in self.m_appendedIds]
+        if not finances:
+            # Nothing was inserted that would make the view ask again
+            if not self.m_atEnd:
+                self.fetchMore()
             return
-        self.beginInsertRows(QModelIndex(), 0, len(data["items"]) - 1)
-        self.m_finances.extend([self.Finance(**item) for item in data["items"]])
+        first = len(self.m_finances)
+        self.beginInsertRows(QModelIndex(), first, first + len(finances) - 1)
+        self.m_finances.extend(finances)
         self.endInsertRows()
 
     def rowCount(self, parent=QModelIndex()):
@@ -72,6 +127,8 @@ class FinanceModel(QAbstractListModel):
                 return finance.date
             if role == FinanceModel.FinanceRole.MonthRole:
                 return finance.month
+            if role == FinanceModel.FinanceRole.PendingRole:
+                return finance.pending
         return None
 
     def roleNames(self):
@@ -81,6 +138,7 @@ class FinanceModel(QAbstractListModel):
         roles[FinanceModel.FinanceRole.CostRole] = QByteArray(b"cost")
         roles[FinanceModel.FinanceRole.DateRole] = QByteArray(b"date")
         roles[FinanceModel.FinanceRole.MonthRole] = QByteArray(b"month")
+        roles[FinanceModel.FinanceRole.PendingRole] = QByteArray(b"pending")
         return roles
 
     @Slot(int, result='QVariantMap')
@@ -91,19 +149,68 @@ class FinanceModel(QAbstractListModel):
 
     @Slot(str, str, float, str)
     def append(self, item_name: str, category: str, cost: float, date: str):
-        finance = {"item_name": item_name, "category": category, "cost": cost, "date": date}
-        response = requests.post("http://127.0.0.1:8000/finances/", json=finance)
-        if response.status_code == 200:
-            finance = response.json()
-            self.beginInsertRows(QModelIndex(), 0, 0)
-            self.m_finances.insert(0, self.Finance(**finance))
-            self.endInsertRows()
-        else:
-            print("Failed to add finance item")
+        # Show the item right away and confirm it when the server replies
+        finance = self.Finance(item_name, category, cost, date, pending=True)
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.m_finances.insert(0, finance)
+        self.endInsertRows()
+
+        request = QNetworkRequest(QUrl(FINANCES_URL))
+        request.setHeader(QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
+        body = json.dumps({"item_name": item_name, "category": category, "cost": cost,
+                           "date": date}).encode()
+        reply = self.m_manager.post(request, QByteArray(body))
+        reply.finished.connect(partial(self._appendReplied, reply, finance))
+
+    def _appendReplied(self, reply, finance):
+        reply.deleteLater()
+        # Rows appended later are inserted before this one
+        row = next(row for row, f in enumerate(self.m_finances) if f is finance)
+        try:
+            if reply.error() != QNetworkReply.NetworkError.NoError:
+                raise ValueError(reply.errorString())
+            confirmed = self.Finance(**json.loads(reply.readAll().data()))
+        except (ValueError, TypeError) as e:
+            print(f"Failed to add finance item: {e}")
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.m_finances[row]
+            self.endRemoveRows()
+            return
+        self.m_finances[row] = confirmed
+        self.m_appendedIds.add(confirmed.id)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        self._fetchSummary()
 
     @Slot(result=dict)
     def getCategoryData(self):
-        category_data = defaultdict(float)
-        for finance in self.m_finances:
-            category_data[finance.category] += finance.cost
-        return dict(category_data)
+        """Return the cached totals per category, fetching them when there
+           are none. summaryChanged is emitted when they arrive."""
+        if self.m_categoryData is None:
+            self._fetchSummary()
+            return {}
+        return dict(self.m_categoryData)
+
+    def _fetchSummary(self):
+        if self.m_summaryReply is not None:
+            # The running request may miss the latest change, ask again after it
+            self.m_summaryStale = True
+            return
+        self.m_summaryStale = False
+        self.m_summaryReply = self.m_manager.get(QNetworkRequest(QUrl(SUMMARY_URL)))
+        self.m_summaryReply.finished.connect(self._summaryReceived)
+
+    def _summaryReceived(self):
+        reply = self.m_summaryReply
+        self.m_summaryReply = None
+        reply.deleteLater()
+        try:
+            if reply.error() != QNetworkReply.NetworkError.NoError:
+                raise ValueError(reply.errorString())
+            self.m_categoryData = json.loads(reply.readAll().data())["categories"]
+        except (ValueError, KeyError) as e:
+            print(f"Failed to fetch the finance summary: {e}")
+            return
+        self.summaryChanged.emit()
+        if self.m_summaryStale:
+            self._fetchSummary()
@@ -0,0 +1,123 @@
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+
+import json
+import os
+import sys
+import unittest
+from pathlib import Path
+
+from PySide6.QtCore import QByteArray, QCoreApplication, QObject, Signal
+from PySide6.QtNetwork import QNetworkReply
+
+sys.path.insert(0, os.fspath(Path(__file__).resolve().parent))
+from financemodel import FINANCES_URL, SUMMARY_URL, FinanceModel  # noqa: E402
+
+
+class FakeReply(QObject):
+    """A reply finishing when the test calls finish()"""
+
+    finished = Signal()
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self._body = b""
+        self._error = QNetworkReply.NetworkError.NoError
+
+    def finish(self, body=None, error=QNetworkReply.NetworkError.NoError):
+        self._body = json.dumps(body).encode()
+        self._error = error
+        self.finished.emit()
+
+    def error(self):
+        return self._error
+
+    def errorString(self):
+        return "failed"
+
+    def readAll(self):
+        return QByteArray(self._body)
+
+
+class FakeNetworkAccessManager:
+    """Records the requests instead of sending them"""
+
+    def __init__(self):
+        self.replies = []
+
+    def get(self, request):
+        self.replies.append(FakeReply(request.url().toString()))
+        return self.replies[-1]
+
+    def post(self, request, data):
+        return self.get(request)
+
+    def pending(self, url):
+        return [reply for reply in self.replies if reply.url == url]
+
+
+class FinanceModelSummaryTest(unittest.TestCase):
+    """The totals per category cached by FinanceModel"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.model = FinanceModel()
+        self.network = FakeNetworkAccessManager()
+        self.model.m_manager = self.network
+        self.changes = 0
+
+        def changed():
+            self.changes += 1
+        self.model.summaryChanged.connect(changed)
+
+    def summaryReplies(self):
+        return self.network.pending(SUMMARY_URL)
+
+    def append(self, cost):
+        self.model.append("Item", "Groceries", cost, "01-01-2024")
+        return self.network.pending(FINANCES_URL)[-1]
+
+    def test_cached(self):
+        self.assertEqual(self.model.getCategoryData(), {})
+        self.assertEqual(len(self.summaryReplies()), 1)
+        self.summaryReplies()[0].finish({"categories": {"Groceries": 1.0}, "months": {}})
+        self.assertEqual(self.changes, 1)
+        self.assertEqual(self.model.getCategoryData(), {"Groceries": 1.0})
+        self.assertEqual(self.model.getCategoryData(), {"Groceries": 1.0})
+        self.assertEqual(len(self.summaryReplies()), 1)
+
+    def test_invalidated_by_append(self):
+        self.model.getCategoryData()
+        self.summaryReplies()[0].finish({"categories": {"Groceries": 1.0}, "months": {}})
+        self.append(2.0).finish({**self.model.get(0), "id": 1})
+        self.assertEqual(len(self.summaryReplies()), 2)
+        self.summaryReplies()[1].finish({"categories": {"Groceries": 3.0}, "months": {}})
+        self.assertEqual(self.changes, 2)
+        self.assertEqual(self.model.getCategoryData(), {"Groceries": 3.0})
+
+    def test_refetched_after_change_while_fetching(self):
+        self.model.getCategoryData()
+        self.append(2.0).finish({**self.model.get(0), "id": 1})
+        # The running request may miss the item, it is asked again after it
+        self.assertEqual(len(self.summaryReplies()), 1)
+        self.summaryReplies()[0].finish({"categories": {"Groceries": 1.0}, "months": {}})
+        self.assertEqual(len(self.summaryReplies()), 2)
+        self.summaryReplies()[1].finish({"categories": {"Groceries": 3.0}, "months": {}})
+        self.assertEqual(len(self.summaryReplies()), 2)
+        self.assertEqual(self.model.getCategoryData(), {"Groceries": 3.0})
+
+    def test_kept_when_append_fails(self):
+        self.model.getCategoryData()
+        self.summaryReplies()[0].finish({"categories": {"Groceries": 1.0}, "months": {}})
+        self.append(2.0).finish(error=QNetworkReply.NetworkError.ConnectionRefusedError)
+        self.assertEqual(self.model.rowCount(), 0)
+        self.assertEqual(len(self.summaryReplies()), 1)
+        self.assertEqual(self.model.getCategoryData(), {"Groceries": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Expand and scroll a large Json array in a QTreeView.
+
+Every repaint calls JsonModel.parent() for the visible rows. For the
+members of an expanded array element, this needs the row of the element
+within the array, so the time per scroll step must not depend on how far
+down the array the view is.
+
+    python benchmark.py --count 1000000
+"""
+
+import sys
+import time
+from argparse import ArgumentParser
+
+from PySide6.QtWidgets import QApplication, QTreeView
+
+from jsonmodel import JsonModel
+
+
+VISIBLE_ROWS = 30
+
+
+def scrollCost(view, array, row, repeat):
+    """Return the average time in ms to scroll to the array element at row
+       and repaint, with the visible elements expanded"""
+    model = view.model()
+    for r in range(row, min(row + VISIBLE_ROWS, model.rowCount(array))):
+        view.expand(model.index(r, 0, array))
+    view.scrollTo(model.index(row, 0, array), QTreeView.ScrollHint.PositionAtTop)
+    bar = view.verticalScrollBar()
+    value = bar.value()
+    start = time.perf_counter()
+    for i in range(repeat):
+        bar.setValue(value + i % 2)
+        view.viewport().repaint()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="JsonModel scroll benchmark")
+    arg_parser.add_argument("--count", type=int, default=1000000,
+                            help="number of array elements")
+    arg_parser.add_argument("--steps", type=int, default=10,
+                            help="number of scroll positions to measure")
+    arg_parser.add_argument("--repeat", type=int, default=20,
+                            help="repaints per scroll position")
+    args = arg_parser.parse_args()
+
+    app = QApplication(sys.argv)
+    view = QTreeView()
+    view.setUniformRowHeights(True)
+    view.resize(500, 600)
+    model = JsonModel()
+    view.setModel(model)
+
+    start = time.perf_counter()
+    model.load({"items": [{"id": i, "name": f"item {i}"} for i in range(args.count)]})
+    print(f"load: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    view.show()
+    start = time.perf_counter()
+    array = model.index(0, 0)
+    view.expand(array)
+    app.processEvents()
+    print(f"expand: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    last = args.count - VISIBLE_ROWS
+    for step in range(args.steps + 1):
+        row = last * step // args.steps
+        cost = scrollCost(view, array, row, args.repeat)
+        print(f"scroll to row {row:>9}: {cost:.3f} ms/frame")
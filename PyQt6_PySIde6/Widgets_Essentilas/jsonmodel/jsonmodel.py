@@ -19,9 +19,11 @@ class TreeItem:
         self._value = ""
         self._value_type = None
         self._children = []
+        self._row = 0
 
     def appendChild(self, item: "TreeItem"):
         """Add item as a child"""
+        item._row = len(self._children)
         self._children.append(item)
 
     def child(self, row: int) -> "TreeItem":
@@ -38,7 +40,7 @@ class TreeItem:
 
     def row(self) -> int:
         """Return the row where the current item occupies in the parent"""
-        return self._parent._children.index(self) if self._parent else 0
+        return self._row
 
     @property
     def key(self) -> str: